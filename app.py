@@ -19,31 +19,15 @@ You should have received a copy of the GNU General Public License
 along with this program. If not, see <https://www.gnu.org/licenses/>.
 """
 
-import io
-import tempfile
 from datetime import datetime, timezone
+from pathlib import Path
 
-import matplotlib.pyplot as plt
-import pandas as pd
 import streamlit as st
 
-from modules.create_bar_animation import (
-    create_bar_animation,
-    days,
-    dpi,
-    interp_steps,
-    period,
-)
-from modules.create_bar_plot import plot_final_frame
-from modules.data_processing import (
-    extract_json_from_zip,
-    fetch_and_process_files,
-    prepare_df_for_visual_anims,
-    prepare_df_for_visual_plots,
-)
+from modules.admission import AdmissionRejected
 from modules.normalize_inputs import normalize_inputs
-from modules.prepare_visuals import error_logged, image_cache
-from modules.supabase_client import supabase
+from modules.render_cache import dataset_hash
+from modules.telemetry import telemetry
 
 st.set_page_config(
     page_title="Spotify Visual Generator",
@@ -132,14 +116,8 @@ def track_event(event_type: str, metadata: dict = None, count: int = 1):
         "metadata": metadata or {},
         "user_event": event_type,
     }
-    try:
-        supabase.table("user_events").insert([event]).execute()
-    except Exception as e:
-        error_message = str(e).lower()
-        if "rate" in error_message or "limit" in error_message:
-            print(f"SUPABASE RATE LIMIT: {e}")
-        else:
-            print(f"SUPABASE ERROR: {e}")
+    # written to Supabase in batches by a background thread
+    telemetry.track(event)
 
 
 # Initialize session state with defaults
@@ -248,7 +226,6 @@ with st.sidebar:
                 ],  # Prevent overlap with end_date
                 key="start_date_input",
             )
-            start_date = pd.to_datetime(start_date)
         with col2:
             max_date = (
                 st.session_state.form_values["data_max_date"]
@@ -264,7 +241,6 @@ with st.sidebar:
                 max_value=max_date,
                 key="end_date_input",
             )
-            end_date = pd.to_datetime(end_date)
 
         submit_form = st.form_submit_button(
             label="Apply Preferences",
@@ -532,17 +508,106 @@ with st.expander(
 uploaded_file = st.file_uploader(
     "Upload your Spotify data (ZIP File)", type=["zip"], accept_multiple_files=False
 )
+
+# the upload page is on screen by now; the data and rendering stack (pandas, polars,
+# matplotlib, spotipy) is imported only from here on, which also keeps the first
+# page load of a fresh server fast
+import pandas as pd  # noqa: E402
+
+from modules.artifact_store import SessionArtifacts, artifact_store  # noqa: E402
+from modules.data_processing import (  # noqa: E402
+    extract_json_from_zip,
+    fetch_and_process_files,
+)
+from modules.instrumentation import request_profile, stage  # noqa: E402
+from modules.metrics import record_ingest, start_metrics_server  # noqa: E402
+from modules.prefetch import start_prefetch  # noqa: E402
+from modules.render_jobs import (  # noqa: E402
+    DONE,
+    cached_animation,
+    cached_render,
+    render_jobs,
+    submit_animation_render,
+    submit_image_render,
+)
+from modules.render_workers import start_render_workers  # noqa: E402
+from modules.session_store import session_store  # noqa: E402
+
+start_metrics_server()
+start_render_workers()
+
+start_date = pd.to_datetime(start_date)
+end_date = pd.to_datetime(end_date)
+
+# recent request profiles (upload and renders) for the performance details panel
+if "performance_profiles" not in st.session_state:
+    st.session_state.performance_profiles = []
+
+
+def add_performance_profile(profile) -> None:
+    """Keep a finished request profile for the performance details panel."""
+    st.session_state.performance_profiles = [
+        profile.to_dict(),
+        *st.session_state.performance_profiles[:9],
+    ]
+
+
+def store_dataset(df) -> None:
+    """
+    Keep the processed upload on disk for later reruns; session state only holds
+    the handle. Replaces the session's previous dataset.
+    """
+    if st.session_state.get("dataset"):
+        st.session_state.dataset.delete()
+    st.session_state.dataset = session_store.put(df, uploaded_file.file_id)
+
+
+def ensure_dataset() -> bool:
+    """
+    Make sure the session has a stored copy of the current upload, processing the
+    ZIP again if it is missing (a different file, or the copy expired). Returns
+    False if the ZIP has no streaming history.
+    """
+    if session_store.exists(st.session_state.get("dataset"), uploaded_file.file_id):
+        return True
+    json_contents = extract_json_from_zip(uploaded_file)
+    if not json_contents:
+        return False
+    store_dataset(fetch_and_process_files(json_contents))
+    return True
+
+
+def load_dataset():
+    """
+    The processed upload as a DataFrame, read from the stored copy, or None if it
+    is no longer available. Only loaded when a render needs it, so no rerun keeps
+    it in memory.
+    """
+    if not ensure_dataset():
+        return None
+    return session_store.get(st.session_state.dataset, uploaded_file.file_id)
+
+
+DATASET_MISSING_MESSAGE = (
+    "Your uploaded data is no longer available, please upload your ZIP file again."
+)
+
+
 if uploaded_file and not st.session_state.form_values["data_uploaded"]:
     try:
-        json_contents = extract_json_from_zip(uploaded_file)
+        with request_profile("upload", zip_bytes=uploaded_file.size) as upload_profile:
+            with stage("ingestion"):
+                json_contents = extract_json_from_zip(uploaded_file)
+                if json_contents:
+                    df = fetch_and_process_files(json_contents)
+        add_performance_profile(upload_profile)
 
         if not json_contents:
             st.error(
                 "No Streaming History JSON files found in the ZIP file. Please make sure you uploaded the correct ZIP file from Spotify."
             )
         else:
-            df = fetch_and_process_files(json_contents)
-
+            record_ingest(uploaded_file.size, len(df))
             start_date_file = df["Date"].min()
             end_date_file = df["Date"].max()
 
@@ -557,7 +622,13 @@ if uploaded_file and not st.session_state.form_values["data_uploaded"]:
                 }
             )
 
-            st.session_state.df = df
+            store_dataset(df)
+
+            # warm the image cache for the likely top items while the user
+            # chooses display options
+            if st.session_state.get("image_prefetcher"):
+                st.session_state.image_prefetcher.cancel()
+            st.session_state.image_prefetcher = start_prefetch(df)
             st.rerun()
 
     except Exception as e:
@@ -565,18 +636,22 @@ if uploaded_file and not st.session_state.form_values["data_uploaded"]:
 
 elif uploaded_file:
     try:
-        json_contents = extract_json_from_zip(uploaded_file)
-        if json_contents:
-            df = fetch_and_process_files(json_contents)
+        if ensure_dataset():
             st.success("Data uploaded successfully! 🎉")
         else:
             st.error("No valid JSON files found in ZIP.")
     except Exception as e:
         st.error(f"Error processing ZIP file: {str(e)}")
-        df = None
 else:
     st.warning("Please upload your Spotify ZIP file to proceed.")
-    df = None
+    if st.session_state.get("dataset"):
+        st.session_state.dataset.delete()
+        st.session_state.dataset = None
+
+# content hash of the upload, the dataset part of render cache keys
+if uploaded_file and st.session_state.get("dataset_file_id") != uploaded_file.file_id:
+    st.session_state.dataset_hash = dataset_hash(uploaded_file.getvalue())
+    st.session_state.dataset_file_id = uploaded_file.file_id
 
 selected_attribute, analysis_metric = normalize_inputs(
     st.session_state.form_values["selected_attribute"],
@@ -589,101 +664,148 @@ if "bar_plot_bytes" not in st.session_state:
     st.session_state.bar_plot_bytes = None
 if "file_name_for_download" not in st.session_state:
     st.session_state.file_name_for_download = None
+if "image_job_id" not in st.session_state:
+    st.session_state.image_job_id = None
+if "image_job_error" not in st.session_state:
+    st.session_state.image_job_error = None
 
-st.subheader("Generate Image", divider="green")
 
-if st.button("Generate Image", key="generate_images_button"):
-    st.session_state.generate_image_clicked = True
+@st.fragment(run_every=1)
+def show_render_job_progress(job_key: str, result_key: str, message: str):
+    """
+    Poll a background render whose id is in st.session_state[f"{job_key}_id"].
+    Once it finishes, its result (or error) is stored in session state and the
+    page reruns to show it.
+    """
+    job = render_jobs.get(st.session_state[f"{job_key}_id"])
+    if job is None:
+        st.session_state[f"{job_key}_id"] = None
+        st.rerun()
+    if job.finished:
+        render_jobs.pop(job.id)
+        if job.profile is not None:
+            add_performance_profile(job.profile)
+        if job.status == DONE:
+            # rendered files become the session's, bytes are kept as they are
+            st.session_state[result_key] = (
+                st.session_state.artifacts.add(job.result)
+                if isinstance(job.result, str)
+                else job.result
+            )
+        else:
+            st.session_state[f"{job_key}_error"] = job.error
+        st.session_state[f"{job_key}_id"] = None
+        st.rerun()
+
+    if job.total_frames:
+        text = f"{job.stage}: frame {job.frames_done:,} of {job.total_frames:,}"
+        if job.eta_seconds is not None:
+            text += f" (about {job.eta_seconds:.0f}s left)"
+    else:
+        text = f"{job.stage}..."
+    st.progress(job.progress, text=text)
+    st.write(message)
 
-if st.session_state.generate_image_clicked:
-    track_event(
-        "generate_image",
-        metadata={
-            "selected_attribute": selected_attribute,
-            "analysis_metric": analysis_metric,
-            "top_n": top_n,
-        },
-    )
-    st.session_state.generate_image_clicked = False
 
-    if uploaded_file:
-        with st.spinner("Generating visual..."):
-            df_plot = prepare_df_for_visual_plots(
-                df,
-                selected_attribute=selected_attribute,
-                analysis_metric=analysis_metric,
-                start_date=start_date,
-                end_date=end_date,
-                top_n=top_n,
-            )
+@st.fragment
+def image_panel(render_params: dict) -> None:
+    """
+    Generate and download panel of the bar chart image. As a fragment, its buttons
+    rerun only this panel instead of the whole page.
+    """
+    event_metadata = {
+        name: render_params[name]
+        for name in ("selected_attribute", "analysis_metric", "top_n")
+    }
+    st.subheader("Generate Image", divider="green")
+
+    if st.button("Generate Image", key="generate_images_button"):
+        st.session_state.generate_image_clicked = True
+
+    if st.session_state.generate_image_clicked:
+        track_event("generate_image", metadata=event_metadata)
+        st.session_state.generate_image_clicked = False
+
+        if uploaded_file:
+            if st.session_state.image_job_id:
+                st.info("Your visual is already being generated, hang tight! ⏳")
+            else:
+                st.session_state.file_name_for_download = (
+                    f"{render_params['selected_attribute']}_"
+                    f"{render_params['analysis_metric']}_visual.jpg"
+                )
+                cached_path = cached_render(
+                    "image", st.session_state.dataset_hash, **render_params
+                )
+                if cached_path:
+                    with open(cached_path, "rb") as f:
+                        st.session_state.bar_plot_bytes = f.read()
+                else:
+                    df = load_dataset()
+                    if df is None:
+                        st.error(DATASET_MISSING_MESSAGE)
+                    else:
+                        try:
+                            job = submit_image_render(
+                                df,
+                                st.session_state.dataset_hash,
+                                **render_params,
+                            )
+                            st.session_state.image_job_id = job.id
+                            st.session_state.image_job_error = None
+                        except AdmissionRejected as e:
+                            st.warning(str(e))
+        else:
+            st.warning("Please upload your Spotify JSON files to proceed.")
 
-            plt.close("all")
-
-            fig = plot_final_frame(
-                df=df_plot,
-                top_n=top_n,
-                analysis_metric=analysis_metric,
-                selected_attribute=selected_attribute,
-                start_date=start_date,
-                end_date=end_date,
-                period=period,
-                days=days,
-                image_cache=image_cache,
-                error_logged=error_logged,
-            )
+    if st.session_state.image_job_id:
+        show_render_job_progress("image_job", "bar_plot_bytes", "Generating visual...")
+    elif st.session_state.image_job_error:
+        st.error(f"Error generating visual: {st.session_state.image_job_error}")
 
-            buf = io.BytesIO()
-            fig.savefig(
-                buf, format="jpeg", dpi=300, facecolor="#F0F0F0", edgecolor="none"
-            )
-            buf.seek(0)
+    if st.session_state.bar_plot_bytes:
+        st.markdown(
+            "<h4 style='text-align: left;'>Bar Chart Image 📸</h4>",
+            unsafe_allow_html=True,
+        )
+        col1, col2, col3 = st.columns([0.55, 0.44, 0.01])
 
-            st.session_state.bar_plot_bytes = buf.getvalue()
-            st.session_state.file_name_for_download = (
-                f"{selected_attribute}_{analysis_metric}_visual.jpg"
-            )
-    else:
-        st.warning("Please upload your Spotify JSON files to proceed.")
+        with col1:
+            st.image(st.session_state.bar_plot_bytes)
 
-if st.session_state.bar_plot_bytes:
-    st.markdown(
-        "<h4 style='text-align: left;'>Bar Chart Image 📸</h4>",
-        unsafe_allow_html=True,
-    )
-    col1, col2, col3 = st.columns([0.55, 0.44, 0.01])
+        with col2:
+            col_dl_1, col_dl_2, col_dl_3 = st.columns([0.005, 0.99, 0.005])
+            with col_dl_2:
+                st.write("Click the button below to download your visual:")
+                clicked = st.download_button(
+                    label="Download Visual",
+                    data=st.session_state.bar_plot_bytes,
+                    file_name=st.session_state.file_name_for_download,
+                    mime="image/jpeg",
+                    key="download_bar_plot",
+                )
+                if clicked:
+                    st.session_state.download_image_clicked = True
 
-    with col1:
-        st.image(st.session_state.bar_plot_bytes)
+                st.markdown(
+                    "<p style='text-align: left; font-size: 14px; color: gray;'>Then you can upload it to social media and show friends your superior music taste!</p>",
+                    unsafe_allow_html=True,
+                )
 
-    with col2:
-        col_dl_1, col_dl_2, col_dl_3 = st.columns([0.005, 0.99, 0.005])
-        with col_dl_2:
-            st.write("Click the button below to download your visual:")
-            clicked = st.download_button(
-                label="Download Visual",
-                data=st.session_state.bar_plot_bytes,
-                file_name=st.session_state.file_name_for_download,
-                mime="image/jpeg",
-                key="download_bar_plot",
-            )
-            if clicked:
-                st.session_state.download_image_clicked = True
+    if st.session_state.download_image_clicked:
+        track_event("download_image", metadata=event_metadata)
+        st.session_state.download_image_clicked = False
 
-            st.markdown(
-                "<p style='text-align: left; font-size: 14px; color: gray;'>Then you can upload it to social media and show friends your superior music taste!</p>",
-                unsafe_allow_html=True,
-            )
 
-if st.session_state.download_image_clicked:
-    track_event(
-        "download_image",
-        metadata={
-            "selected_attribute": selected_attribute,
-            "analysis_metric": analysis_metric,
-            "top_n": top_n,
-        },
-    )
-    st.session_state.download_image_clicked = False
+image_panel(
+    {
+        "selected_attribute": selected_attribute,
+        "analysis_metric": analysis_metric,
+        "start_date": start_date,
+        "end_date": end_date,
+        "top_n": top_n,
+    }
+)
 
 
 class AnimationState:
@@ -699,96 +821,152 @@ animation_state = AnimationState(top_n)
 
 if "temp_file_path_bar_anim" not in st.session_state:
     st.session_state.temp_file_path_bar_anim = None  # Initialize state
+# rendered files shown to this session, deleted when the session ends
+if "artifacts" not in st.session_state:
+    st.session_state.artifacts = SessionArtifacts(artifact_store)
+if "animation_job_id" not in st.session_state:
+    st.session_state.animation_job_id = None
+if "animation_job_error" not in st.session_state:
+    st.session_state.animation_job_error = None
 
-st.subheader("Generate Animation", divider="green")
-if st.button("Generate Animation", key="generate_animation_button"):
-    st.session_state.generate_animation_clicked = True
-
-if st.session_state.generate_animation_clicked:
-    track_event(
-        "generate_animation",
-        metadata={
-            "selected_attribute": selected_attribute,
-            "analysis_metric": analysis_metric,
-            "top_n": top_n,
-        },
-    )
-    st.session_state.generate_animation_clicked = False  # reset flag
 
-    if uploaded_file:
-        with st.spinner("Generating animation..."):
-            message_placeholder = st.empty()
-            message_placeholder.write(
-                "Hold tight, this may take a few minutes if your data covers many years 😬"
-            )
-            df_anim = prepare_df_for_visual_anims(
-                df,
-                selected_attribute=selected_attribute,
-                analysis_metric=analysis_metric,
-                start_date=start_date,
-                end_date=end_date,
-                top_n=top_n,
-            )
+@st.fragment
+def animation_panel(render_params: dict) -> None:
+    """
+    Generate and download panel of the bar chart race. As a fragment, its buttons
+    rerun only this panel instead of the whole page.
+    """
+    event_metadata = {
+        name: render_params[name]
+        for name in ("selected_attribute", "analysis_metric", "top_n")
+    }
+    st.subheader("Generate Animation", divider="green")
+    if st.button("Generate Animation", key="generate_animation_button"):
+        st.session_state.generate_animation_clicked = True
+
+    if st.session_state.generate_animation_clicked:
+        track_event("generate_animation", metadata=event_metadata)
+        st.session_state.generate_animation_clicked = False  # reset flag
+
+        if uploaded_file:
+            if st.session_state.animation_job_id:
+                st.info("Your animation is already being generated, hang tight! ⏳")
+            else:
+                cached_path = cached_animation(
+                    st.session_state.dataset_hash, **render_params
+                )
+                if cached_path:
+                    st.session_state.temp_file_path_bar_anim = (
+                        st.session_state.artifacts.add(cached_path)
+                    )
+                else:
+                    df = load_dataset()
+                    if df is None:
+                        st.error(DATASET_MISSING_MESSAGE)
+                    else:
+                        try:
+                            job = submit_animation_render(
+                                df,
+                                st.session_state.dataset_hash,
+                                **render_params,
+                            )
+                            st.session_state.animation_job_id = job.id
+                            st.session_state.animation_job_error = None
+                        except AdmissionRejected as e:
+                            st.warning(str(e))
+        else:
+            st.warning("Please upload your Spotify JSON files to proceed.")
 
-            anim_bar_plot = create_bar_animation(
-                df_anim,
-                top_n,
-                analysis_metric,
-                selected_attribute,
-                period,
-                dpi,
-                days,
-                interp_steps,
-                start_date,
-                end_date,
-            )
+    if st.session_state.animation_job_id:
+        show_render_job_progress(
+            "animation_job",
+            "temp_file_path_bar_anim",
+            "Hold tight, this may take a few minutes if your data covers many years 😬",
+        )
+    elif st.session_state.animation_job_error:
+        st.error(f"Error generating animation: {st.session_state.animation_job_error}")
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_file:
-                temp_file_path = temp_file.name
-                anim_bar_plot.save(
-                    temp_file_path,
-                    writer="ffmpeg",
-                    fps=speed_for_bar_animation,
-                    savefig_kwargs={"facecolor": "#F0F0F0"},
-                )
-                st.session_state.temp_file_path_bar_anim = temp_file_path
-    else:
-        st.warning("Please upload your Spotify JSON files to proceed.")
+    # files expire after a long idle time or when the session goes over its quota
+    animation_path = st.session_state.temp_file_path_bar_anim
+    if animation_path and not st.session_state.artifacts.touch(animation_path):
+        st.session_state.temp_file_path_bar_anim = animation_path = None
 
-if st.session_state.get("temp_file_path_bar_anim"):
-    st.markdown(
-        "<h4 style='text-align: left;'>Bar Chart Race 📊</h4>",
-        unsafe_allow_html=True,
-    )
-    col1, col2, col3 = st.columns([0.55, 0.44, 0.01])
-    with col1:
-        st.video(st.session_state.temp_file_path_bar_anim)
+    if animation_path:
+        st.markdown(
+            "<h4 style='text-align: left;'>Bar Chart Race 📊</h4>",
+            unsafe_allow_html=True,
+        )
+        col1, col2, col3 = st.columns([0.55, 0.44, 0.01])
+        with col1:
+            st.video(animation_path)
 
-    with col2:
-        col1, col2, col3 = st.columns([0.005, 0.99, 0.005])
         with col2:
-            st.write("Click the button below to download your Animation:")
-            with open(st.session_state.temp_file_path_bar_anim, "rb") as f:
+            col1, col2, col3 = st.columns([0.005, 0.99, 0.005])
+            with col2:
+                st.write("Click the button below to download your Animation:")
+                # the file is only read when the button is clicked
                 clicked = st.download_button(
                     label="Download Animation",
-                    data=f.read(),
-                    file_name=f"{selected_attribute}_{analysis_metric}_animation.mp4",
+                    data=Path(animation_path).read_bytes,
+                    file_name=(
+                        f"{render_params['selected_attribute']}_"
+                        f"{render_params['analysis_metric']}_animation.mp4"
+                    ),
                     mime="video/mp4",
                     key="download_bar_animation",
                 )
                 if clicked:
                     st.session_state.download_animation_clicked = True
 
-if st.session_state.download_animation_clicked:
-    track_event(
-        "download_animation",
-        metadata={
-            "selected_attribute": selected_attribute,
-            "analysis_metric": analysis_metric,
-            "top_n": top_n,
-        },
-    )
-    st.session_state.download_animation_clicked = False  # reset flag
+    if st.session_state.download_animation_clicked:
+        track_event("download_animation", metadata=event_metadata)
+        st.session_state.download_animation_clicked = False  # reset flag
+
+
+animation_panel(
+    {
+        "selected_attribute": selected_attribute,
+        "analysis_metric": analysis_metric,
+        "start_date": start_date,
+        "end_date": end_date,
+        "top_n": top_n,
+        "fps": speed_for_bar_animation,
+    }
+)
+
+if st.session_state.performance_profiles:
+    with st.expander("Performance details"):
+        for profile in st.session_state.performance_profiles:
+            st.markdown(
+                f"**{profile['name'].capitalize()}** ({profile['status']}): "
+                f"{profile['wall_s']:.2f}s wall, {profile['cpu_s']:.2f}s CPU, "
+                f"peak memory {profile['peak_rss_mb']:.0f} MB"
+            )
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            # nested stages are indented under their parent
+                            "Stage": "\u00a0" * 4 * stage_record["depth"]
+                            + stage_record["stage"],
+                            "Wall (s)": stage_record.get("wall_s"),
+                            "CPU (s)": stage_record.get("cpu_s"),
+                            "Peak memory (MB)": stage_record.get("peak_rss_mb"),
+                        }
+                        for stage_record in profile["stages"]
+                    ]
+                ),
+                hide_index=True,
+            )
+            if profile["caches"]:
+                st.caption(
+                    "Cache hit ratios: "
+                    + ", ".join(
+                        f"{name} {cache['hit_ratio']:.0%} "
+                        f"({cache['hits']}/{cache['hits'] + cache['misses']})"
+                        for name, cache in profile["caches"].items()
+                    )
+                )
 
 st.markdown("<br>", unsafe_allow_html=True)
 st.subheader("License", divider="green")
@@ -0,0 +1,124 @@
+"""
+Benchmark the NumPy dominant color extractor against the previous ColorThief
+implementation on a batch of cover images, reporting speed and color agreement.
+
+Usage:
+    python -m benchmarks.bench_dominant_color [--covers DIR] [--count N] [--size PX]
+
+Without --covers, a batch of synthetic covers (colored blocks, gradients and noise)
+is generated so the benchmark runs offline.
+"""
+
+import argparse
+import colorsys
+import os
+import time
+from io import BytesIO
+
+import numpy as np
+from colorthief import ColorThief
+from PIL import Image
+
+from modules.color_extraction import dominant_color
+
+# colors closer than this (euclidean distance in RGB space) count as agreeing
+AGREEMENT_THRESHOLD = 40
+
+
+def colorthief_dominant_color(img: Image) -> tuple:
+    """Previous implementation: PNG round-trip into ColorThief + HSV vibrancy filter."""
+    with BytesIO() as byte_stream:
+        img.save(byte_stream, format="PNG")
+        byte_stream.seek(0)
+        color_thief = ColorThief(byte_stream)
+        palette = color_thief.get_palette(color_count=5, quality=5)
+
+    vibrant_colors = []
+    for rgb in palette:
+        h, s, v = colorsys.rgb_to_hsv(rgb[0] / 255, rgb[1] / 255, rgb[2] / 255)
+        if s > 0.3 and 0.2 < v < 0.95:
+            vibrant_colors.append(rgb)
+    return vibrant_colors[0] if vibrant_colors else palette[0]
+
+
+def synthetic_covers(count: int, size: int, seed: int = 7) -> list:
+    """Generate cover-like images: a dominant background, accent blocks and noise."""
+    rng = np.random.default_rng(seed)
+    covers = []
+    for _ in range(count):
+        base = rng.integers(0, 256, size=3)
+        arr = np.empty((size, size, 3), dtype=np.float64)
+        arr[:] = base
+        # vertical gradient
+        arr *= np.linspace(0.7, 1.0, size)[:, None, None]
+        # a few accent rectangles
+        for _ in range(rng.integers(1, 4)):
+            x0, y0 = rng.integers(0, size // 2, size=2)
+            w, h = rng.integers(size // 8, size // 2, size=2)
+            arr[y0 : y0 + h, x0 : x0 + w] = rng.integers(0, 256, size=3)
+        arr += rng.normal(0, 8, size=arr.shape)
+        covers.append(Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8)))
+    return covers
+
+
+def load_covers(directory: str, size: int) -> list:
+    """Load every image in a directory, resized the same way the app does."""
+    covers = []
+    for file_name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, file_name)
+        try:
+            with Image.open(path) as img:
+                covers.append(
+                    img.convert("RGB").resize((size, size), Image.Resampling.LANCZOS)
+                )
+        except OSError:
+            continue
+    return covers
+
+
+def time_extractor(extractor, covers: list) -> tuple:
+    """Run an extractor over all covers, returning (colors, seconds)."""
+    start = time.perf_counter()
+    colors = [extractor(img) for img in covers]
+    return colors, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--covers", help="directory of cover images to use")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--size", type=int, default=165)
+    args = parser.parse_args()
+
+    if args.covers:
+        covers = load_covers(args.covers, args.size)
+    else:
+        covers = synthetic_covers(args.count, args.size)
+    if not covers:
+        raise SystemExit("No cover images to benchmark.")
+
+    legacy_colors, legacy_time = time_extractor(colorthief_dominant_color, covers)
+    numpy_colors, numpy_time = time_extractor(dominant_color, covers)
+
+    distances = np.linalg.norm(
+        np.array(legacy_colors, dtype=float) - np.array(numpy_colors, dtype=float),
+        axis=1,
+    )
+    agreement = float(np.mean(distances <= AGREEMENT_THRESHOLD))
+
+    print(f"covers:               {len(covers)} @ {args.size}px")
+    print(
+        f"colorthief:           {legacy_time:.3f}s "
+        f"({legacy_time / len(covers) * 1000:.2f} ms/cover)"
+    )
+    print(
+        f"numpy histogram:      {numpy_time:.3f}s "
+        f"({numpy_time / len(covers) * 1000:.2f} ms/cover)"
+    )
+    print(f"speedup:              {legacy_time / numpy_time:.1f}x")
+    print(f"agreement (<= {AGREEMENT_THRESHOLD}):    {agreement:.1%}")
+    print(f"median RGB distance:  {np.median(distances):.1f}")
+
+
+if __name__ == "__main__":
+    main()
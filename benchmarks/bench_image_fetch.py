@@ -0,0 +1,132 @@
+"""
+Measure end-to-end image acquisition throughput of modules/prepare_visuals.py
+against the local fake Spotify API and CDN (benchmarks/fake_spotify.py).
+
+Each round clears the shared caches and preloads images for artists, songs and
+albums through preload_images_batch, exactly as a render does: batched track and
+artist lookups (50 ids per call), then parallel CDN downloads.
+
+Usage:
+    python -m benchmarks.bench_image_fetch [--entities 50] [--latency 0.05]
+        [--rate-limit-rate 0.02] [--failure-rate 0.01] [--rounds 3]
+"""
+
+import argparse
+import json
+import os
+import time
+
+# every lookup goes through the stand-in client set in main(), and the fake API does
+# not check credentials; these only satisfy get_secret if the real client is built
+os.environ.setdefault("SPOTIFY_CLIENT_ID", "benchmark")
+os.environ.setdefault("SPOTIFY_CLIENT_SECRET", "benchmark")
+
+import pandas as pd  # noqa: E402
+import spotipy  # noqa: E402
+
+from benchmarks.fake_spotify import FakeCatalog, FakeSpotifyServer  # noqa: E402
+from modules import prepare_visuals  # noqa: E402
+
+ITEM_TYPES = {"artist_name": "artist", "track_name": "track", "album_name": "album"}
+
+
+def build_dataset(catalog: FakeCatalog, entities: int) -> pd.DataFrame:
+    """One row per catalog track, shaped like the app's aggregated monthly_df."""
+    rows = [
+        {
+            "track_name": track_name,
+            "artist_name": artist_name,
+            "album_name": album_name,
+            "track_uri": f"spotify:track:{track_id}",
+        }
+        for track_id, (track_name, artist_name, album_name) in catalog.tracks.items()
+    ]
+    return pd.DataFrame(rows).head(entities * 2)
+
+
+def clear_caches() -> None:
+    for cache in (
+        prepare_visuals.image_cache,
+        prepare_visuals.image_variants,
+        prepare_visuals.color_cache,
+    ):
+        cache.clear()
+
+
+def run_round(df: pd.DataFrame, entities: int, target_size: int) -> dict:
+    """Preload every attribute once from a cold cache, returning timings."""
+    clear_caches()
+    result = {}
+    for selected_attribute, item_type in ITEM_TYPES.items():
+        names = df[selected_attribute].drop_duplicates().head(entities).tolist()
+        start = time.perf_counter()
+        prepare_visuals.preload_images_batch(
+            names, df, selected_attribute, item_type, target_size
+        )
+        elapsed = time.perf_counter() - start
+        resolved = sum(1 for name in names if prepare_visuals.image_cache.get(name))
+        result[selected_attribute] = {
+            "entities": len(names),
+            "resolved": resolved,
+            "seconds": round(elapsed, 4),
+            "images_per_second": round(resolved / elapsed, 2) if elapsed else None,
+        }
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Image fetch throughput benchmark.")
+    parser.add_argument("--entities", type=int, default=50)
+    parser.add_argument("--target-size", type=int, default=115)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--image-latency", type=float, default=0.02)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    catalog = FakeCatalog.generate(args.entities, 1, 2)
+    server = FakeSpotifyServer(
+        catalog=catalog,
+        latency=args.latency,
+        jitter=args.jitter,
+        image_latency=args.image_latency,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    ).start()
+
+    client = spotipy.Spotify(auth="benchmark-token")
+    client.prefix = server.api_prefix
+    prepare_visuals.set_spotify_client(client)
+
+    df = build_dataset(catalog, args.entities)
+    rounds = []
+    for i in range(args.rounds):
+        round_result = run_round(df, args.entities, args.target_size)
+        rounds.append(round_result)
+        summary = ", ".join(
+            f"{attr}: {r['resolved']}/{r['entities']} in {r['seconds']:.2f}s"
+            for attr, r in round_result.items()
+        )
+        print(f"round {i + 1}: {summary}")
+
+    results = {
+        "config": vars(args),
+        "rounds": rounds,
+        "server_counters": dict(server.counters),
+    }
+    print(json.dumps(results["server_counters"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Track cold-start import latency of app.py with python -X importtime.
+
+The imports at the top of app.py run before anything is on screen ("startup"); the
+imports further down run after the upload page has been sent to the browser
+("deferred"). Each phase is imported in a fresh interpreter, so every run is a cold
+import, and the cumulative time of its top-level packages is reported.
+
+Usage:
+    python -m benchmarks.bench_import_time [--rounds 5] [--top 10] [--output out.json]
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def app_import_phases(app_path: str = os.path.join(ROOT, "app.py")) -> dict:
+    """Import statements of app.py split into the startup block and later ones."""
+    with open(app_path) as f:
+        tree = ast.parse(f.read())
+
+    phases = {"startup": [], "deferred": []}
+    phase = "startup"
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            phases[phase].append(ast.unparse(node))
+        elif not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant)):
+            # the first statement that is not the docstring or an import
+            phase = "deferred"
+    return phases
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Cumulative microseconds per top-level package from -X importtime output."""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue  # nested import or the header line
+        packages[name.strip()] = int(cumulative)
+    return packages
+
+
+def measure(statements: list, preload: list = ()) -> dict:
+    """Import statements in a fresh interpreter after the preload ones (not timed)."""
+    code = "\n".join(list(preload) + ["import sys; sys.stderr.write('--\\n')"])
+    code += "\n" + "\n".join(statements)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    timed = result.stderr.split("--\n", 1)[-1]
+    packages = parse_importtime(timed)
+    return {"wall": wall, "total_us": sum(packages.values()), "packages": packages}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="app.py import-time benchmark.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    phases = app_import_phases()
+    results = {"config": vars(args), "phases": {}}
+    for phase, statements in phases.items():
+        # deferred imports are measured with the startup ones already loaded
+        preload = phases["startup"] if phase == "deferred" else ()
+        runs = [measure(statements, preload) for _ in range(args.rounds)]
+        last = runs[-1]["packages"]
+        heaviest = sorted(last.items(), key=lambda item: item[1], reverse=True)
+        results["phases"][phase] = {
+            "statements": statements,
+            "import_ms_median": round(
+                statistics.median(run["total_us"] for run in runs) / 1000, 1
+            ),
+            "process_wall_ms_median": round(
+                statistics.median(run["wall"] for run in runs) * 1000, 1
+            ),
+            "heaviest_packages_ms": {
+                name: round(us / 1000, 1) for name, us in heaviest[: args.top]
+            },
+        }
+        phase_result = results["phases"][phase]
+        print(
+            f"{phase}: {phase_result['import_ms_median']:.1f} ms of imports "
+            f"({len(statements)} statements, median of {args.rounds})"
+        )
+        for name, ms in phase_result["heaviest_packages_ms"].items():
+            print(f"    {name:<40} {ms:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Time each stage of the render pipeline on synthetic histories of increasing size.
+
+For every --plays scale a history ZIP is generated (benchmarks/synthetic_history.py)
+and run through the same stages as the app: ZIP extraction, JSON processing, the
+image and animation data preparation, the static image, the animation setup (with
+precompute_data and image acquisition timed separately) and, for a sample of frames,
+the per-frame update, rasterization and H.264 encode. Artwork is served by the local
+fake Spotify API, so the results do not depend on the network.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--plays 10000,100000] [--years 5]
+        [--top-n 10] [--frames 60] [--rounds 3] [--output results.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+# the fake API does not check credentials, but the client is built from them
+os.environ.setdefault("SPOTIFY_CLIENT_ID", "benchmark")
+os.environ.setdefault("SPOTIFY_CLIENT_SECRET", "benchmark")
+
+import matplotlib as mpl  # noqa: E402
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import spotipy  # noqa: E402
+
+from benchmarks.fake_spotify import FakeSpotifyServer  # noqa: E402
+from benchmarks.synthetic_history import generate_history_zip  # noqa: E402
+from modules import create_bar_animation as bar_animation  # noqa: E402
+from modules import prepare_visuals  # noqa: E402
+from modules.create_bar_plot import plot_final_frame  # noqa: E402
+from modules.data_processing import (  # noqa: E402
+    extract_json_from_zip,
+    fetch_and_process_files,
+    prepare_df_for_visual_anims,
+    prepare_df_for_visual_plots,
+)
+from modules.figure_templates import figure_templates  # noqa: E402
+from modules.retime import MASTER_FPS  # noqa: E402
+
+
+def timed(fn, *args, **kwargs) -> tuple:
+    """(result, seconds) of one call."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+@contextmanager
+def timing_calls(module, name: str, timings: list):
+    """Record the duration of every call to module.name while in the block."""
+    original = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            timings.append(time.perf_counter() - start)
+
+    setattr(module, name, wrapper)
+    try:
+        yield timings
+    finally:
+        setattr(module, name, original)
+
+
+def summarize(samples: list) -> dict:
+    """Median, min and max of a list of durations in seconds."""
+    return {
+        "median_s": round(statistics.median(samples), 4),
+        "min_s": round(min(samples), 4),
+        "max_s": round(max(samples), 4),
+        "runs": len(samples),
+    }
+
+
+def per_frame(samples: list) -> dict:
+    """Mean and 95th percentile of per-frame durations, in milliseconds."""
+    ms = np.array(samples) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+    }
+
+
+def clear_image_caches() -> None:
+    for cache in (
+        prepare_visuals.image_cache,
+        prepare_visuals.image_variants,
+        prepare_visuals.color_cache,
+    ):
+        cache.clear()
+
+
+def bench_data_stages(zip_path: str, params: dict, rounds: int) -> tuple:
+    """
+    Timings of the ingestion, preparation and static image stages over the whole
+    date range of the history. Also returns the processed df and the full params.
+    """
+    samples = {
+        name: []
+        for name in (
+            "extract_json_from_zip",
+            "fetch_and_process_files",
+            "prepare_df_for_visual_plots",
+            "prepare_df_for_visual_anims",
+            "render_image",
+        )
+    }
+    for _ in range(rounds):
+        json_contents, seconds = timed(extract_json_from_zip, zip_path)
+        samples["extract_json_from_zip"].append(seconds)
+        df, seconds = timed(fetch_and_process_files, json_contents)
+        samples["fetch_and_process_files"].append(seconds)
+        params = {
+            **params,
+            "start_date": df["Date"].min(),
+            "end_date": df["Date"].max(),
+        }
+
+        df_plot, seconds = timed(prepare_df_for_visual_plots, df.copy(), **params)
+        samples["prepare_df_for_visual_plots"].append(seconds)
+        _, seconds = timed(prepare_df_for_visual_anims, df.copy(), **params)
+        samples["prepare_df_for_visual_anims"].append(seconds)
+
+        start = time.perf_counter()
+        fig = plot_final_frame(
+            df=df_plot,
+            period=bar_animation.period,
+            days=bar_animation.days,
+            **params,
+        )
+        fig.savefig(io.BytesIO(), format="jpeg", dpi=300, facecolor="#F0F0F0")
+        figure_templates.release(fig)
+        samples["render_image"].append(time.perf_counter() - start)
+    return {name: summarize(s) for name, s in samples.items()}, df, params
+
+
+def bench_animation(df, params: dict, frames: int, work_dir: str) -> dict:
+    """Animation setup stages, then per-frame update, draw and encode timings."""
+    clear_image_caches()
+    df_anim = prepare_df_for_visual_anims(df.copy(), **params)
+    precompute_timings, preload_timings = [], []
+    with timing_calls(bar_animation, "precompute_data", precompute_timings):
+        with timing_calls(bar_animation, "preload_images_batch", preload_timings):
+            anim, setup_seconds = timed(
+                bar_animation.create_bar_animation,
+                df_anim,
+                params["top_n"],
+                params["analysis_metric"],
+                params["selected_attribute"],
+                bar_animation.period,
+                bar_animation.dpi,
+                bar_animation.days,
+                bar_animation.interp_steps,
+                params["start_date"],
+                params["end_date"],
+            )
+
+    # FuncAnimation keeps the frame function and frame count in these attributes;
+    # frames are driven by hand here so that each step can be timed on its own
+    fig = anim._fig
+    total_frames = anim._save_count
+    width, height = fig.canvas.get_width_height()
+    # the same encoder settings as matplotlib's ffmpeg writer uses for anim.save
+    encoder = subprocess.Popen(
+        [
+            mpl.rcParams["animation.ffmpeg_path"],
+            "-v",
+            "error",
+            "-y",
+            "-f",
+            "rawvideo",
+            "-vcodec",
+            "rawvideo",
+            "-s",
+            f"{width}x{height}",
+            "-pix_fmt",
+            "rgba",
+            "-framerate",
+            str(MASTER_FPS),
+            "-i",
+            "pipe:",
+            "-vcodec",
+            "h264",
+            "-pix_fmt",
+            "yuv420p",
+            os.path.join(work_dir, "frames.mp4"),
+        ],
+        stdin=subprocess.PIPE,
+    )
+    update, draw, encode = [], [], []
+    try:
+        for frame in range(min(frames, total_frames)):
+            start = time.perf_counter()
+            anim._func(frame, *anim._args)
+            update.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            fig.canvas.draw()
+            draw.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            encoder.stdin.write(fig.canvas.buffer_rgba())
+            encode.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        encoder.stdin.close()
+        encoder.wait()
+        encode_flush = time.perf_counter() - start
+    finally:
+        plt.close(fig)
+
+    frame_seconds = statistics.mean(u + d + e for u, d, e in zip(update, draw, encode))
+    return {
+        "animation_setup_s": round(
+            setup_seconds - sum(precompute_timings) - sum(preload_timings), 4
+        ),
+        "precompute_data_s": round(sum(precompute_timings), 4),
+        "image_preload_s": round(sum(preload_timings), 4),
+        "total_frames": total_frames,
+        "sampled_frames": len(update),
+        "frame_update": per_frame(update),
+        "frame_draw": per_frame(draw),
+        "frame_encode": per_frame(encode),
+        "encode_flush_s": round(encode_flush, 4),
+        "estimated_render_s": round(frame_seconds * total_frames, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render pipeline stage benchmark.")
+    parser.add_argument(
+        "--plays",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[10000, 100000],
+        help="comma separated history sizes",
+    )
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--attribute", default="artist_name")
+    parser.add_argument("--metric", default="Streams")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {
+        "config": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "scales": [],
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        for plays in args.plays:
+            zip_path = os.path.join(work_dir, f"history_{plays}.zip")
+            library, generate_seconds = timed(
+                generate_history_zip, zip_path, plays, args.years, seed=args.seed
+            )
+            server = FakeSpotifyServer(catalog=library.catalog).start()
+            client = spotipy.Spotify(auth="benchmark-token")
+            client.prefix = server.api_prefix
+            prepare_visuals.set_spotify_client(client)
+
+            stages, df, params = bench_data_stages(
+                zip_path,
+                {
+                    "selected_attribute": args.attribute,
+                    "analysis_metric": args.metric,
+                    "top_n": args.top_n,
+                },
+                args.rounds,
+            )
+            animation = bench_animation(df, params, args.frames, work_dir)
+            server.shutdown()
+            results["scales"].append(
+                {
+                    "plays": plays,
+                    "years": args.years,
+                    "rows": len(df),
+                    "zip_bytes": os.path.getsize(zip_path),
+                    "generate_s": round(generate_seconds, 2),
+                    "stages": stages,
+                    "animation": animation,
+                }
+            )
+
+            print(f"{plays} plays ({len(df)} rows after processing):")
+            for name, stage in stages.items():
+                print(f"    {name:<32} {stage['median_s'] * 1000:>10.1f} ms")
+            for name in ("animation_setup_s", "precompute_data_s", "image_preload_s"):
+                print(f"    {name[:-2]:<32} {animation[name] * 1000:>10.1f} ms")
+            for name in ("frame_update", "frame_draw", "frame_encode"):
+                print(f"    {name:<32} {animation[name]['mean_ms']:>10.1f} ms/frame")
+            print(
+                f"    {'estimated_render':<32} {animation['estimated_render_s']:>10.1f} s"
+                f" ({animation['total_frames']} frames)"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Local stand-in for the Spotify Web API and image CDN, for offline fetch benchmarks
+and load tests of the image pipeline in modules/prepare_visuals.py.
+
+It implements the endpoints the app uses (tracks, artists, albums and search) and
+serves generated JPEG covers in 640, 300 and 64 px variants. Latency, 429 rate
+limiting and failures can be injected; all randomness is seeded.
+
+Usage:
+    python -m benchmarks.fake_spotify --port 8765 --latency 0.05 --rate-limit-rate 0.02
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image, ImageDraw
+
+IMAGE_SIZES = (640, 300, 64)
+
+
+def _entity_id(prefix: str, key: str) -> str:
+    """Deterministic base-62 compatible id for a name."""
+    return prefix + hashlib.sha1(key.encode("utf-8")).hexdigest()[:18]
+
+
+class FakeCatalog:
+    """
+    Tracks known to the fake API, each with an artist and an album.
+    Unknown track ids still resolve, to a generated artist and album.
+    """
+
+    def __init__(self):
+        self.tracks = {}  # track_id -> (track_name, artist_name, album_name)
+
+    def add_track(self, track_name: str, artist_name: str, album_name: str) -> str:
+        """Register a track and return its URI."""
+        track_id = _entity_id("trk", f"{track_name}|{artist_name}")
+        self.tracks[track_id] = (track_name, artist_name, album_name)
+        return f"spotify:track:{track_id}"
+
+    @classmethod
+    def generate(cls, n_artists: int, albums_per_artist: int, tracks_per_album: int):
+        catalog = cls()
+        for a in range(n_artists):
+            artist_name = f"Artist {a:04d}"
+            for b in range(albums_per_artist):
+                album_name = f"Album {a:04d}-{b:02d}"
+                for t in range(tracks_per_album):
+                    catalog.add_track(
+                        f"Track {a:04d}-{b:02d}-{t:02d}", artist_name, album_name
+                    )
+        return catalog
+
+    def resolve(self, track_id: str) -> tuple:
+        return self.tracks.get(
+            track_id,
+            (f"Track {track_id}", f"Artist {track_id[-6:]}", f"Album {track_id[-6:]}"),
+        )
+
+
+class FakeSpotifyServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the catalog, fault injection settings and counters.
+
+    Args:
+        latency: Seconds added to every API response (plus uniform jitter).
+        jitter: Maximum extra random latency in seconds.
+        image_latency: Seconds added to every image response.
+        rate_limit_rate: Probability of answering an API call with 429.
+        retry_after: Retry-After header value sent with 429 responses.
+        failure_rate: Probability of answering any request with 500.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        catalog: FakeCatalog = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        image_latency: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 1,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        super().__init__(address, FakeSpotifyHandler)
+        self.catalog = catalog or FakeCatalog()
+        self.latency = latency
+        self.jitter = jitter
+        self.image_latency = image_latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._images = {}
+        self.counters = Counter()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_prefix(self) -> str:
+        """Value for spotipy.Spotify.prefix to route the client to this server."""
+        return f"{self.base_url}/v1/"
+
+    def roll(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[key] += amount
+
+    def image_bytes(self, key: str, size: int) -> bytes:
+        """Generated JPEG cover: a hashed background color with an accent block."""
+        with self._lock:
+            cached = self._images.get((key, size))
+        if cached is not None:
+            return cached
+
+        digest = hashlib.sha1(key.encode("utf-8")).digest()
+        img = Image.new("RGB", (size, size), tuple(digest[:3]))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle(
+            [size // 4, size // 4, size * 3 // 4, size * 3 // 4],
+            fill=tuple(digest[3:6]),
+        )
+        buf = BytesIO()
+        img.save(buf, format="JPEG", quality=85)
+        data = buf.getvalue()
+        with self._lock:
+            self._images[(key, size)] = data
+        return data
+
+    def images(self, key: str) -> list:
+        return [
+            {
+                "url": f"{self.base_url}/images/{key}/{size}.jpg",
+                "width": size,
+                "height": size,
+            }
+            for size in IMAGE_SIZES
+        ]
+
+    def start(self) -> "FakeSpotifyServer":
+        """Serve in a background daemon thread."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class FakeSpotifyHandler(BaseHTTPRequestHandler):
+    server: FakeSpotifyServer
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        parts = [part for part in parsed.path.split("/") if part]
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        server = self.server
+
+        if parts and parts[0] == "images":
+            server.count("images")
+            time.sleep(server.image_latency)
+            if server.roll() < server.failure_rate:
+                server.count("failures")
+                return self._send_json(500, {"error": {"status": 500}})
+            if len(parts) != 3:
+                return self._send_json(404, {"error": {"status": 404}})
+            size = int(parts[2].split(".")[0])
+            data = server.image_bytes(parts[1], size)
+            server.count("image_bytes", len(data))
+            return self._send(200, data, "image/jpeg")
+
+        if not parts or parts[0] != "v1" or len(parts) < 2:
+            return self._send_json(404, {"error": {"status": 404}})
+
+        endpoint = parts[1]
+        server.count(f"api:{endpoint}")
+        time.sleep(server.latency + server.roll() * server.jitter)
+
+        if server.roll() < server.rate_limit_rate:
+            server.count("429s")
+            return self._send_json(
+                429,
+                {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                headers={"Retry-After": str(server.retry_after)},
+            )
+        if server.roll() < server.failure_rate:
+            server.count("failures")
+            return self._send_json(500, {"error": {"status": 500}})
+
+        ids = query.get("ids", "").split(",") if query.get("ids") else parts[2:3]
+        if endpoint == "tracks":
+            tracks = [self._track(track_id) for track_id in ids]
+            body = {"tracks": tracks} if "ids" in query else tracks[0]
+        elif endpoint == "artists":
+            body = {"artists": [self._artist_by_id(artist_id) for artist_id in ids]}
+        elif endpoint == "albums":
+            body = {"albums": [self._album_by_id(album_id) for album_id in ids]}
+        elif endpoint == "search":
+            body = self._search(query.get("q", ""), query.get("type", "track"))
+        else:
+            return self._send_json(404, {"error": {"status": 404}})
+        return self._send_json(200, body)
+
+    def _artist(self, artist_name: str) -> dict:
+        artist_id = _entity_id("art", artist_name)
+        return {
+            "id": artist_id,
+            "uri": f"spotify:artist:{artist_id}",
+            "name": artist_name,
+            "images": self.server.images(artist_id),
+        }
+
+    def _album(self, album_name: str, artist_name: str) -> dict:
+        album_id = _entity_id("alb", f"{album_name}|{artist_name}")
+        return {
+            "id": album_id,
+            "uri": f"spotify:album:{album_id}",
+            "name": album_name,
+            "artists": [self._artist(artist_name)],
+            "images": self.server.images(album_id),
+        }
+
+    def _track(self, track_id: str) -> dict:
+        track_name, artist_name, album_name = self.server.catalog.resolve(track_id)
+        return {
+            "id": track_id,
+            "uri": f"spotify:track:{track_id}",
+            "name": track_name,
+            "artists": [self._artist(artist_name)],
+            "album": self._album(album_name, artist_name),
+        }
+
+    def _artist_by_id(self, artist_id: str) -> dict:
+        for _, artist_name, _ in self.server.catalog.tracks.values():
+            if _entity_id("art", artist_name) == artist_id:
+                return self._artist(artist_name)
+        return None
+
+    def _album_by_id(self, album_id: str) -> dict:
+        for _, artist_name, album_name in self.server.catalog.tracks.values():
+            if _entity_id("alb", f"{album_name}|{artist_name}") == album_id:
+                return self._album(album_name, artist_name)
+        return None
+
+    def _search(self, q: str, search_type: str) -> dict:
+        # queries look like "artist:Name" or "album:Title artist:Name"
+        fields = {
+            match.group(1): match.group(2).strip()
+            for match in re.finditer(r"(\w+):(.*?)(?=\s+\w+:|$)", q)
+        }
+        if search_type == "artist":
+            return {"artists": {"items": [self._artist(fields.get("artist", q))]}}
+        if search_type == "album":
+            album = self._album(fields.get("album", q), fields.get("artist", ""))
+            return {"albums": {"items": [album]}}
+        return {"tracks": {"items": []}}
+
+    def _send_json(self, status: int, body, headers: dict = None) -> None:
+        self._send(
+            status, json.dumps(body).encode("utf-8"), "application/json", headers
+        )
+
+    def _send(self, status: int, data: bytes, content_type: str, headers=None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local fake Spotify API and CDN.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--image-latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeSpotifyServer(
+        (args.host, args.port),
+        catalog=FakeCatalog.generate(200, 2, 5),
+        latency=args.latency,
+        jitter=args.jitter,
+        image_latency=args.image_latency,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    print(f"Fake Spotify API listening on {server.api_prefix}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Generate realistic Spotify extended streaming history ZIPs for benchmarks and load tests.
+
+Plays are spread over the requested number of years, with daily listening that dips
+at night and varies by season. Artist popularity follows a Zipf distribution, as do
+the tracks within each artist, so a few favourites dominate like in real histories.
+Names come from Faker and every track is registered in a FakeCatalog, so the fake
+Spotify API (benchmarks/fake_spotify.py) serves artwork for all of them.
+
+Usage:
+    python -m benchmarks.synthetic_history --plays 100000 --years 5 --output history.zip
+"""
+
+import argparse
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+from benchmarks.fake_spotify import FakeCatalog
+
+# real exports split the history into files of roughly this many plays
+PLAYS_PER_FILE = 16000
+ZIP_FOLDER = "Spotify Extended Streaming History"
+PLATFORMS = ["android", "ios", "windows", "osx", "web_player"]
+REASONS_END = ["trackdone", "fwdbtn", "endplay", "logout", "backbtn"]
+
+
+class SyntheticLibrary:
+    """
+    Catalog of fake artists, albums and tracks with Zipf popularity weights.
+
+    Args:
+        n_artists: Number of distinct artists.
+        zipf_exponent: Skew of artist and track popularity (1.0 is classic Zipf).
+    """
+
+    def __init__(
+        self,
+        n_artists: int,
+        albums_per_artist: int = 3,
+        tracks_per_album: int = 10,
+        zipf_exponent: float = 1.1,
+        seed: int = 0,
+    ):
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.catalog = FakeCatalog()
+        self.tracks = []  # (track_name, artist_name, album_name, uri) per artist
+        for a in range(n_artists):
+            # the index keeps names unique even when Faker repeats itself
+            artist_name = f"{fake.name()} {a}"
+            artist_tracks = []
+            for _ in range(albums_per_artist):
+                album_name = fake.catch_phrase().title()
+                for _ in range(tracks_per_album):
+                    track_name = fake.sentence(nb_words=3).rstrip(".").title()
+                    uri = self.catalog.add_track(track_name, artist_name, album_name)
+                    artist_tracks.append((track_name, artist_name, album_name, uri))
+            self.tracks.append(artist_tracks)
+        self.artist_weights = zipf_weights(n_artists, zipf_exponent)
+        self.track_weights = zipf_weights(
+            albums_per_artist * tracks_per_album, zipf_exponent
+        )
+
+
+def zipf_weights(n: int, exponent: float) -> np.ndarray:
+    """Probabilities proportional to 1 / rank ** exponent for ranks 1..n."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def default_artist_count(plays: int) -> int:
+    """Library size growing with the history, like a real listener's."""
+    return int(min(max(plays**0.5, 20), 3000))
+
+
+def play_timestamps(
+    rng: np.random.Generator, plays: int, years: float, end: pd.Timestamp
+) -> np.ndarray:
+    """Sorted play times with daily and seasonal listening patterns."""
+    start = end - pd.Timedelta(days=int(365 * years))
+    n_days = (end - start).days
+    # more listening in winter, with a random day-to-day variation
+    day_of_year = (np.arange(n_days) + start.dayofyear) % 365
+    day_weights = (1.2 + 0.3 * np.cos(2 * np.pi * day_of_year / 365)) * rng.gamma(
+        4.0, 0.25, n_days
+    )
+    days = rng.choice(n_days, size=plays, p=day_weights / day_weights.sum())
+    # listening peaks in the evening and is rare at night
+    hour_weights = 0.1 + np.exp(-(((np.arange(24) - 19) / 5) ** 2))
+    hours = rng.choice(24, size=plays, p=hour_weights / hour_weights.sum())
+    seconds = rng.integers(0, 3600, size=plays)
+    offsets = days * 86400 + hours * 3600 + seconds
+    return np.sort(start.value // 10**9 + offsets)
+
+
+def generate_plays(
+    library: SyntheticLibrary,
+    plays: int,
+    years: float,
+    end: pd.Timestamp = pd.Timestamp("2025-01-01"),
+    seed: int = 0,
+    chunk_size: int = PLAYS_PER_FILE,
+):
+    """
+    Play records in the format of Spotify's extended streaming history, yielded in
+    chunks of chunk_size so that millions of plays never sit in memory as dicts.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = np.datetime_as_string(
+        play_timestamps(rng, plays, years, end).astype("datetime64[s]"), unit="s"
+    )
+    artists = rng.choice(len(library.tracks), size=plays, p=library.artist_weights)
+    tracks = rng.choice(len(library.track_weights), size=plays, p=library.track_weights)
+    # mostly full plays of 2-5 minutes, with some skips under the 30 s cut-off
+    ms_played = np.where(
+        rng.random(plays) < 0.15,
+        rng.integers(500, 30000, size=plays),
+        rng.integers(120000, 300000, size=plays),
+    ).tolist()
+    platforms = rng.choice(len(PLATFORMS), size=plays).tolist()
+    reasons = rng.choice(len(REASONS_END), size=plays).tolist()
+    shuffle = (rng.random(plays) < 0.4).tolist()
+
+    for chunk_start in range(0, plays, chunk_size):
+        records = []
+        for i in range(chunk_start, min(chunk_start + chunk_size, plays)):
+            track_name, artist_name, album_name, uri = library.tracks[artists[i]][
+                tracks[i]
+            ]
+            records.append(
+                {
+                    "ts": f"{timestamps[i]}Z",
+                    "platform": PLATFORMS[platforms[i]],
+                    "ms_played": ms_played[i],
+                    "conn_country": "GB",
+                    "master_metadata_track_name": track_name,
+                    "master_metadata_album_artist_name": artist_name,
+                    "master_metadata_album_album_name": album_name,
+                    "spotify_track_uri": uri,
+                    "episode_name": None,
+                    "episode_show_name": None,
+                    "spotify_episode_uri": None,
+                    "reason_start": "trackdone",
+                    "reason_end": REASONS_END[reasons[i]],
+                    "shuffle": shuffle[i],
+                    "skipped": ms_played[i] < 30000,
+                    "offline": False,
+                    "offline_timestamp": None,
+                    "incognito_mode": False,
+                }
+            )
+        yield records
+
+
+def write_history_zip(path: str, chunks) -> list:
+    """Write chunks of plays as Streaming_History_Audio_*.json files in a ZIP."""
+    names = []
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for chunk in chunks:
+            years = f"{chunk[0]['ts'][:4]}-{chunk[-1]['ts'][:4]}"
+            name = f"{ZIP_FOLDER}/Streaming_History_Audio_{years}_{len(names)}.json"
+            zf.writestr(name, json.dumps(chunk, indent=2))
+            names.append(name)
+    return names
+
+
+def generate_history_zip(
+    path: str, plays: int, years: float, n_artists: int = None, seed: int = 0
+) -> SyntheticLibrary:
+    """Generate a history of the given size into a ZIP and return its library."""
+    library = SyntheticLibrary(n_artists or default_artist_count(plays), seed=seed)
+    write_history_zip(path, generate_plays(library, plays, years, seed=seed))
+    return library
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synthetic Spotify history ZIP.")
+    parser.add_argument("--plays", type=int, default=100000)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--artists", type=int, help="default grows with --plays")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="synthetic_history.zip")
+    args = parser.parse_args()
+
+    generate_history_zip(args.output, args.plays, args.years, args.artists, args.seed)
+    size_mb = os.path.getsize(args.output) / 1024 / 1024
+    print(
+        f"Wrote {args.plays} plays over {args.years} years to {args.output} "
+        f"({size_mb:.1f} MB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
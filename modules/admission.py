@@ -0,0 +1,193 @@
+"""
+This module provides server-wide admission control for renders. Every render job
+must hold a slot for its kind (animation or image) before it starts, and is only
+admitted while the host has enough free memory for it. Jobs wait in a FIFO queue per
+kind and can report their queue position; when the queue is full, or a job waits too
+long, it is rejected with AdmissionRejected instead of overloading the process.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psutil
+
+MB = 1024 * 1024
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+# concurrent renders per kind across all sessions
+RENDER_SLOTS = {
+    "animation": _env_int("RENDER_SLOTS_ANIMATION", 2),
+    "image": _env_int("RENDER_SLOTS_IMAGE", 2),
+}
+# rough peak memory per render: a 16x21.2in figure canvas plus cached images for
+# animations (and the ffmpeg process), a 4800x6360px canvas and JPEG copy for images
+RENDER_MEMORY_MB = {
+    "animation": _env_int("RENDER_MEMORY_MB_ANIMATION", 600),
+    "image": _env_int("RENDER_MEMORY_MB_IMAGE", 500),
+}
+MAX_QUEUED_RENDERS = _env_int("MAX_QUEUED_RENDERS", 20)
+MAX_QUEUE_WAIT_SECONDS = _env_int("MAX_QUEUE_WAIT_SECONDS", 600)
+# memory left free for the app itself and other sessions
+MEMORY_HEADROOM_MB = _env_int("RENDER_MEMORY_HEADROOM_MB", 300)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a render cannot be admitted (queue full or waited too long)."""
+
+
+class AdmissionController:
+    """
+    Per-kind concurrency slots with a memory check and FIFO waiting queues.
+
+    Args:
+        slots: Maximum concurrent jobs per kind.
+        memory_mb: Estimated peak memory per job of each kind.
+        max_queued: Maximum jobs waiting across all kinds before new ones are rejected.
+        max_wait: Seconds a job may wait for a slot before it is rejected.
+        headroom_mb: Available memory that must remain after admitting a job.
+    """
+
+    def __init__(
+        self,
+        slots: dict,
+        memory_mb: dict,
+        max_queued: int,
+        max_wait: float,
+        headroom_mb: int,
+        poll_interval: float = 1.0,
+    ):
+        self.slots = dict(slots)
+        self.memory_mb = dict(memory_mb)
+        self.max_queued = max_queued
+        self.max_wait = max_wait
+        self.headroom_mb = headroom_mb
+        self.poll_interval = poll_interval
+        self._running = {kind: 0 for kind in slots}
+        self._waiting = {kind: deque() for kind in slots}
+        # places in the queue held by submitted jobs that have not started waiting yet
+        self._reserved = {kind: 0 for kind in slots}
+        self._condition = threading.Condition()
+        self.admitted = 0
+        self.rejected = 0
+        self.memory_waits = 0
+
+    def reserve(self, kind: str) -> None:
+        """
+        Take a place in the waiting queue for a job that is being submitted, so a
+        burst of submissions cannot overfill the queue before the jobs start waiting.
+        The place passes to slot(kind, reserved=True) or is given back with
+        release_reservation().
+
+        Raises:
+            AdmissionRejected: If the waiting queue is already full.
+        """
+        with self._condition:
+            if self._queued() >= self.max_queued:
+                self.rejected += 1
+                raise AdmissionRejected(
+                    "The app is very busy right now, please try again in a few minutes."
+                )
+            self._reserved[kind] += 1
+
+    def release_reservation(self, kind: str) -> None:
+        """Give back a place taken by reserve() for a job that will not run."""
+        with self._condition:
+            self._reserved[kind] -= 1
+
+    @contextmanager
+    def slot(self, kind: str, on_wait=None, reserved: bool = False):
+        """
+        Hold a render slot of the given kind for the duration of the block.
+
+        Args:
+            kind: Job kind, a key of slots.
+            on_wait: Called with the 1-based queue position while the job waits.
+            reserved: The job holds a place taken by reserve(), which its place in
+                the waiting queue replaces.
+        """
+        self._acquire(kind, on_wait, reserved)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running[kind] -= 1
+                self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """Snapshot of running and waiting jobs per kind and admission counters."""
+        with self._condition:
+            return {
+                "running": dict(self._running),
+                "waiting": {
+                    kind: len(q) + self._reserved[kind]
+                    for kind, q in self._waiting.items()
+                },
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "memory_waits": self.memory_waits,  # checks deferred for memory
+                "available_mb": psutil.virtual_memory().available // MB,
+            }
+
+    def _acquire(self, kind: str, on_wait, reserved: bool) -> None:
+        ticket = object()
+        deadline = time.monotonic() + self.max_wait
+        with self._condition:
+            queue = self._waiting[kind]
+            queue.append(ticket)
+            if reserved:
+                self._reserved[kind] -= 1
+            try:
+                while not self._can_start(kind, ticket):
+                    if on_wait is not None:
+                        on_wait(queue.index(ticket) + 1)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise AdmissionRejected(
+                            "Timed out waiting for a free render slot, "
+                            "please try again in a few minutes."
+                        )
+                    # memory is not signalled, so re-check it periodically
+                    self._condition.wait(min(remaining, self.poll_interval))
+            finally:
+                queue.remove(ticket)
+                self._condition.notify_all()
+            self._running[kind] += 1
+            self.admitted += 1
+
+    def _can_start(self, kind: str, ticket) -> bool:
+        # callers hold the lock
+        if self._waiting[kind][0] is not ticket:
+            return False
+        if self._running[kind] >= self.slots[kind]:
+            return False
+        if not any(self._running.values()):
+            # never starve: with nothing running, admit regardless of memory
+            return True
+        available_mb = psutil.virtual_memory().available // MB
+        if available_mb - self.memory_mb[kind] < self.headroom_mb:
+            self.memory_waits += 1
+            return False
+        return True
+
+    def _queued(self) -> int:
+        # callers hold the lock
+        return sum(len(q) for q in self._waiting.values()) + sum(
+            self._reserved.values()
+        )
+
+
+admission = AdmissionController(
+    slots=RENDER_SLOTS,
+    memory_mb=RENDER_MEMORY_MB,
+    max_queued=MAX_QUEUED_RENDERS,
+    max_wait=MAX_QUEUE_WAIT_SECONDS,
+    headroom_mb=MEMORY_HEADROOM_MB,
+)
@@ -0,0 +1,145 @@
+"""
+This module manages the rendered files handed to sessions (the MP4 animations), so
+that none are left behind in the temp directory. Renders write their output to a
+path from new_path(), and each session adopts the files it shows into its own
+SessionArtifacts, stored in session state:
+
+- files of a session are deleted when the session ends (its SessionArtifacts is
+  garbage collected), and its oldest files are deleted once it holds more than
+  ARTIFACT_SESSION_QUOTA_MB;
+- files not used for ARTIFACT_TTL_SECONDS are swept, which also removes outputs of
+  renders that failed or were never picked up.
+
+Files from the render cache are adopted as hard links (copies across file systems),
+so cache eviction does not pull a file from under a session that is showing it.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+
+MB = 1024 * 1024
+
+ARTIFACT_DIR = os.environ.get(
+    "ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "spotify_artifacts")
+)
+ARTIFACT_TTL_SECONDS = int(os.environ.get("ARTIFACT_TTL_SECONDS", 3600))
+ARTIFACT_SESSION_QUOTA_MB = int(os.environ.get("ARTIFACT_SESSION_QUOTA_MB", 200))
+SWEEP_INTERVAL_SECONDS = 60
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_all(paths: list) -> None:
+    for path in paths:
+        _remove(path)
+    paths.clear()
+
+
+class ArtifactStore:
+    """Directory of rendered files with idle expiry by modification time."""
+
+    def __init__(self, directory: str, ttl_seconds: int, session_quota_bytes: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.session_quota_bytes = session_quota_bytes
+        self._lock = threading.Lock()
+        self._next_sweep = 0
+        self.expired = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def new_path(self, suffix: str) -> str:
+        """Unused path in the store for a render to write to."""
+        self.sweep()
+        return os.path.join(self.directory, uuid.uuid4().hex + suffix)
+
+    def discard(self, path: str) -> None:
+        """Delete a file, e.g. the output of a failed render."""
+        _remove(path)
+
+    def adopt(self, path: str) -> str:
+        """
+        Path of the file inside the store: files already in it are returned as is,
+        others (e.g. render cache entries) are linked or copied in.
+        """
+        if os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.directory):
+            return path
+        new_path = self.new_path(os.path.splitext(path)[1])
+        try:
+            os.link(path, new_path)
+        except OSError:
+            shutil.copyfile(path, new_path)
+        return new_path
+
+    def sweep(self) -> None:
+        """Remove files not used within the TTL (at most once a minute)."""
+        now = time.time()
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+        for entry in os.scandir(self.directory):
+            try:
+                expired = now - entry.stat().st_mtime > self.ttl_seconds
+            except FileNotFoundError:
+                continue
+            if expired:
+                _remove(entry.path)
+                with self._lock:
+                    self.expired += 1
+
+
+class SessionArtifacts:
+    """The files of one session; they are deleted along with this object."""
+
+    def __init__(self, store: ArtifactStore):
+        self.store = store
+        self._paths = []  # oldest first
+        weakref.finalize(self, _remove_all, self._paths)
+
+    def add(self, path: str) -> str:
+        """
+        Take ownership of a rendered file and return its path in the store. The
+        oldest files of the session are deleted if it is now over its quota.
+        """
+        path = self.store.adopt(path)
+        if path not in self._paths:
+            self._paths.append(path)
+        total = sum(self._size(p) for p in self._paths)
+        while total > self.store.session_quota_bytes and len(self._paths) > 1:
+            oldest = self._paths.pop(0)
+            total -= self._size(oldest)
+            _remove(oldest)
+        return path
+
+    def touch(self, path: str) -> bool:
+        """Mark a file of the session as in use; False if it no longer exists."""
+        if path not in self._paths:
+            return False
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._paths.remove(path)
+            return False
+        return True
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+
+artifact_store = ArtifactStore(
+    ARTIFACT_DIR, ARTIFACT_TTL_SECONDS, ARTIFACT_SESSION_QUOTA_MB * MB
+)
@@ -0,0 +1,153 @@
+"""
+This module provides a circuit breaker for calls to external services (the Spotify
+Web API and image CDN). After repeated failures the circuit opens and calls are
+rejected immediately, so renders fall back to cached or placeholder images instead
+of waiting on timeouts. After a cool-down a single probe call is let through
+(half-open); its outcome closes the circuit again or re-opens it.
+
+The circuit state can be moved into shared memory with share(), so render worker
+processes trip, probe and recover together with the app process.
+"""
+
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATES = (CLOSED, OPEN, HALF_OPEN)
+
+
+class _SharedField:
+    """Circuit state field stored as a float in the breaker's _shared sequence."""
+
+    def __init__(self, index: int, decode=float, encode=float):
+        self.index = index
+        self.decode = decode
+        self.encode = encode
+
+    def __get__(self, breaker, owner=None):
+        return self.decode(breaker._shared[self.index])
+
+    def __set__(self, breaker, value) -> None:
+        breaker._shared[self.index] = self.encode(value)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker with consecutive-failure tripping.
+
+    Args:
+        name: Label used in logs and stats.
+        failure_threshold: Consecutive failures that open the circuit.
+        reset_timeout: Seconds to stay open before letting a probe through.
+    """
+
+    _state = _SharedField(0, lambda value: STATES[int(value)], STATES.index)
+    _consecutive_failures = _SharedField(1, int)
+    _opened_at = _SharedField(2)
+    _probe_in_flight = _SharedField(3, bool)
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        # state, consecutive failures, opened at and probe in flight; the counters
+        # below stay per process
+        self._shared = [STATES.index(CLOSED), 0, 0.0, 0]
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+
+    def share(self, context):
+        """
+        Move the circuit state into shared memory of a multiprocessing context and
+        return it; child processes pass it to attach() to share the circuit.
+        """
+        with self._lock:
+            shared = context.Array("d", list(self._shared))
+        self.attach(shared)
+        return shared
+
+    def attach(self, shared) -> None:
+        """Use circuit state returned by share() in another process."""
+        self._shared = shared
+        self._lock = shared.get_lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go ahead now; counts a rejection if not."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if (
+                self._state == OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED
+                and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self.trips += 1
+                self._set_state(OPEN)
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker, recording any exception as a failure."""
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> dict:
+        """Snapshot of state and counters."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "trips": self.trips,
+            }
+
+    def _set_state(self, state: str) -> None:
+        # callers hold the lock
+        print(f"Circuit breaker {self.name}: {self._state} -> {state}")
+        self._state = state
@@ -0,0 +1,74 @@
+"""
+This module provides a vectorized dominant color extractor for cover images.
+Pixels are quantized into a coarse RGB histogram with NumPy, which replaces the
+PNG round-trip and pure-Python median cut previously done through ColorThief.
+"""
+
+import colorsys
+
+import numpy as np
+from PIL import Image
+
+# bits kept per channel when quantizing, 4 bits -> 16 levels -> 4096 bins
+QUANT_BITS = 4
+
+
+def extract_palette(img: Image, color_count: int = 5) -> list:
+    """
+    Extract the most common colors of an image using histogram quantization.
+
+    Args:
+        img: The image to analyze.
+        color_count: Maximum number of colors to return.
+
+    Returns:
+        list: RGB tuples (r, g, b) between 0-255, most populated first.
+    """
+    pixels = np.asarray(img.convert("RGBA"), dtype=np.uint8).reshape(-1, 4)
+
+    # same pixel filtering as ColorThief: skip transparent and near-white pixels
+    opaque = pixels[:, 3] >= 125
+    not_white = ~np.all(pixels[:, :3] > 250, axis=1)
+    rgb = pixels[opaque & not_white, :3]
+    if rgb.size == 0:
+        rgb = pixels[:, :3]
+
+    shift = 8 - QUANT_BITS
+    quantized = (rgb >> shift).astype(np.int32)
+    bins = (
+        (quantized[:, 0] << (2 * QUANT_BITS))
+        | (quantized[:, 1] << QUANT_BITS)
+        | quantized[:, 2]
+    )
+
+    n_bins = 1 << (3 * QUANT_BITS)
+    counts = np.bincount(bins, minlength=n_bins)
+    sums = np.stack(
+        [np.bincount(bins, weights=rgb[:, c], minlength=n_bins) for c in range(3)],
+        axis=1,
+    )
+
+    populated = np.flatnonzero(counts)
+    top = populated[np.argsort(counts[populated], kind="stable")[::-1][:color_count]]
+    means = np.rint(sums[top] / counts[top, None]).astype(int)
+    return [tuple(int(c) for c in color) for color in means]
+
+
+def pick_vibrant_color(palette: list) -> tuple:
+    """Return the first vibrant (non-grey) color of a palette, or its first color."""
+    for rgb in palette:
+        # Convert RGB (0-255) to HSV (h: 0-1, s: 0-1, v: 0-1)
+        h, s, v = colorsys.rgb_to_hsv(rgb[0] / 255, rgb[1] / 255, rgb[2] / 255)
+
+        # Filter out low-saturation (grey-like) colors
+        # s < 0.2 is very grey; v < 0.2 is too dark; v > 0.95 might be too white
+        if s > 0.3 and 0.2 < v < 0.95:
+            return rgb
+
+    # If no vibrant colors found, fall back to the first palette color
+    return palette[0]
+
+
+def dominant_color(img: Image, color_count: int = 5) -> tuple:
+    """Extract a vibrant dominant color from an image, avoiding greys."""
+    return pick_vibrant_color(extract_palette(img, color_count))
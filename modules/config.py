@@ -0,0 +1,54 @@
+"""
+This module resolves secrets (API credentials) for both the Streamlit app and the
+command line renderer. A secret is looked up in the environment first, then in a TOML
+config file, and finally in st.secrets when running inside Streamlit, so the render
+code never needs the Streamlit runtime just to read its credentials.
+
+The config file uses the same flat key = "value" format as .streamlit/secrets.toml,
+which is also the default location, so one file serves both entry points.
+"""
+
+import os
+import sys
+import tomllib
+
+from modules.paths import ROOT_DIR
+
+CONFIG_PATH = os.environ.get(
+    "APP_CONFIG_PATH", os.path.join(ROOT_DIR, ".streamlit", "secrets.toml")
+)
+
+_config_cache = {}
+
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """Contents of the TOML config file, or an empty dict if it does not exist."""
+    if path not in _config_cache:
+        try:
+            with open(path, "rb") as f:
+                _config_cache[path] = tomllib.load(f)
+        except FileNotFoundError:
+            _config_cache[path] = {}
+    return _config_cache[path]
+
+
+def get_secret(name: str) -> str:
+    """
+    Value of a secret from the environment, the config file or st.secrets.
+
+    Raises:
+        KeyError: If the secret is not set anywhere.
+    """
+    value = os.environ.get(name) or load_config().get(name)
+    if value:
+        return value
+    # only consult st.secrets if the app already loaded Streamlit
+    if "streamlit" in sys.modules:
+        import streamlit as st
+
+        if name in st.secrets:
+            return st.secrets[name]
+    raise KeyError(
+        f"{name} is not set; export it as an environment variable or add it to "
+        f"{CONFIG_PATH}"
+    )
@@ -3,29 +3,24 @@ This module provides functions to create a bar chart animation for Spotify data
 It includes functions to set up the animation, process data, and handle image fetching and caching.
 """
 
-import os
 import textwrap
-import time
 import warnings
-from concurrent.futures import ThreadPoolExecutor
-from io import BytesIO
 
 import matplotlib.animation as animation
-import matplotlib.image as mpimg
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import requests
 from matplotlib.offsetbox import AnnotationBbox, OffsetImage
-from PIL import Image
 
+from modules.frame_profiler import FrameProfiler
+from modules.instrumentation import stage
 from modules.prepare_visuals import (
-    fetch_images_batch,
-    get_dominant_color,
-    get_fonts,
-    image_cache,
+    IMAGE_DEADLINE_SECONDS,
+    get_cached_image,
+    preload_images_batch,
     setup_bar_plot_style,
 )
+from modules.resources import get_fonts, get_spotify_logo
 from modules.state import AnimationState
 
 warnings.filterwarnings(
@@ -39,119 +34,6 @@ interp_steps = 14
 period = "d"
 
 
-def preload_images_batch(
-    names, monthly_df, selected_attribute, item_type, top_n, target_size=200
-) -> None:
-    """
-    Preload images using batch API + parallel downloads - same as create_bar_plot.py
-    """
-    items_to_fetch = []
-    cache_keys = []
-
-    for name in names:
-        cache_key = f"{name}_top_n_{top_n}"
-        cache_keys.append(cache_key)
-
-        if cache_key not in image_cache:
-            matching_rows = monthly_df[monthly_df[selected_attribute] == name]
-            if not matching_rows.empty:
-                row = matching_rows.iloc[0]
-                item_data = {"name": name, "type": item_type, "cache_key": cache_key}
-
-                if "track_uri" in row and row["track_uri"]:
-                    item_data["track_uri"] = row["track_uri"]
-                else:
-                    if item_type == "artist":
-                        item_data["artist_name"] = name
-                        item_data["search_required"] = True
-
-                items_to_fetch.append(item_data)
-
-    # batch API calls
-    if items_to_fetch:
-        batch_items = [
-            item for item in items_to_fetch if not item.get("search_required")
-        ]
-        search_items = [item for item in items_to_fetch if item.get("search_required")]
-        batch_results = {}
-
-        if batch_items:
-            batch_results = fetch_images_batch(batch_items)
-        if search_items:
-            from modules.prepare_visuals import fetch_image
-
-            for item in search_items:
-                try:
-                    image_url = fetch_image(item["name"], "artist")
-                    if image_url:
-                        batch_results[item["name"]] = image_url
-                    time.sleep(0.1)
-                except Exception as e:
-                    print(f"Search failed for {item['name']}: {e}")
-
-        # prepare download tasks
-        download_tasks = []
-        for item in items_to_fetch:
-            image_url = None
-            if item["type"] == "track":
-                image_url = batch_results.get(
-                    item.get("track_uri")
-                ) or batch_results.get(item["name"])
-            elif item["type"] == "album":
-                image_url = batch_results.get(item["name"])
-            elif item["type"] == "artist":
-                image_url = batch_results.get(item["name"])
-
-            if image_url:
-                download_tasks.append(
-                    {
-                        "name": item["name"],
-                        "cache_key": item["cache_key"],
-                        "image_url": image_url,
-                        "target_size": target_size,
-                    }
-                )
-            else:
-                print(f"No image URL found for {item['name']} (type: {item['type']})")
-
-        # download images in parallel for efficiency
-        if download_tasks:
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                futures = [
-                    executor.submit(_download_and_cache_image, task)
-                    for task in download_tasks
-                ]
-
-                successful_downloads = 0
-                for future in futures:
-                    if future.result():
-                        successful_downloads += 1
-
-    # handle already cached items
-    for name, cache_key in zip(names, cache_keys):
-        if cache_key in image_cache:
-            pass
-
-
-def _download_and_cache_image(task) -> bool:
-    """Download and cache a single image - designed for parallel execution"""
-    name = task["name"]
-    cache_key = task["cache_key"]
-    image_url = task["image_url"]
-    target_size = task["target_size"]
-    try:
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        img = Image.open(BytesIO(response.content))
-        img_resized = img.resize((target_size, target_size), Image.Resampling.LANCZOS)
-        color = get_dominant_color(img_resized, name)
-        image_cache[cache_key] = {"img": img_resized, "color": color}
-        return True
-    except Exception:
-        image_cache[cache_key] = None
-        return False
-
-
 def precompute_data(
     monthly_df, selected_attribute, analysis_metric, top_n, start_date, end_date
 ) -> tuple:
@@ -239,8 +121,13 @@ def create_bar_animation(
     interp_steps,
     start_date,
     end_date,
+    profiler: FrameProfiler = None,
 ) -> animation.FuncAnimation:
-    """Prepare the bar chart animation with optimized runtime."""
+    """
+    Prepare the bar chart animation with optimized runtime. With a FrameProfiler,
+    the phases of each sampled frame are timed (see modules/frame_profiler.py).
+    """
+    profiler = profiler or FrameProfiler(sample_every=0)
     # Figure setup
     fig, ax = plt.subplots(figsize=(16, 21.2), dpi=dpi)
     fig.patch.set_facecolor("#F0F0F0")  # Set background color to light gray
@@ -265,12 +152,7 @@ def create_bar_animation(
     )
 
     # Load Spotify Image
-    img_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        "2024 Spotify Brand Assets",
-        "Spotify_Full_Logo_RGB_Green.png",
-    )
-    img = mpimg.imread(img_path)
+    img = get_spotify_logo()
     image_axes = fig.add_axes([0.38, 0.555, 0.29, 0.59])
     image_axes.imshow(img)
     image_axes.axis("off")
@@ -369,14 +251,15 @@ def create_bar_animation(
             )[analysis_metric].cumsum()
 
     # Precompute data to avoid per-frame aggregation for efficiency
-    timestamps, precomputed_data = precompute_data(
-        monthly_df,
-        selected_attribute,
-        analysis_metric,
-        top_n,
-        start_date,
-        end_date,
-    )
+    with stage("aggregation"):
+        timestamps, precomputed_data = precompute_data(
+            monthly_df,
+            selected_attribute,
+            analysis_metric,
+            top_n,
+            start_date,
+            end_date,
+        )
 
     # Image scaling and positioning
     top_n_scale_mapping_height = {
@@ -408,8 +291,23 @@ def create_bar_animation(
 
     # Batch preload images
     all_names = monthly_df[selected_attribute].unique()
-    preload_images_batch(
-        all_names, monthly_df, selected_attribute, item_type, top_n, target_size
+    with stage("image acquisition"):
+        preload_images_batch(
+            all_names,
+            monthly_df,
+            selected_attribute,
+            item_type,
+            target_size,
+            timeout=IMAGE_DEADLINE_SECONDS,
+        )
+        # resolve images once so every frame of this render uses the same art, even
+        # if late downloads replace placeholders in the cache mid-render
+        render_images = {
+            name: get_cached_image(name, target_size, placeholder=True)
+            for name in all_names
+        }
+    uses_placeholders = any(
+        img_data and img_data.get("placeholder") for img_data in render_images.values()
     )
     # Start all bars off-screen
     if top_n == 1:
@@ -549,6 +447,18 @@ def create_bar_animation(
 
     interp_steps = interp_steps
 
+    profiler.wrap_draw(fig, "rasterization")
+    for bar in bars:
+        profiler.wrap_draw(bar, "draw_bars")
+    for text in [
+        *text_objects,
+        *label_objects,
+        *artist_label_objects,
+        year_text,
+        month_text,
+    ]:
+        profiler.wrap_draw(text, "draw_text")
+
     initial_top_sorted = (
         monthly_df[monthly_df["Date"] <= timestamps[0]]
         .nlargest(top_n, f"Cumulative_{analysis_metric}")
@@ -573,8 +483,7 @@ def create_bar_animation(
 
     for i, name in enumerate(initial_names):
         if name:
-            cache_key = f"{name}_top_n_{top_n}"
-            img_data = image_cache.get(cache_key)
+            img_data = render_images.get(name)
             if img_data and img_data["color"]:
                 bars[i].set_facecolor(np.array(img_data["color"]) / 255)
 
@@ -585,9 +494,17 @@ def create_bar_animation(
         """Quadratic ease-in-out function to handle smooth transitions."""
         return t * t * (3 - 2 * t)
 
+    def remove_image_annotation(i) -> None:
+        if image_annotations[i]:
+            with profiler.phase("annotation_churn"):
+                image_annotations[i].remove()
+            image_annotations[i] = None
+
     def animate(frame) -> None:
         """Update the bar chart for each frame."""
         nonlocal anim_state
+        profiler.start_frame(frame)
+        profiler.begin("interpolation")
         main_frame = frame // interp_steps
         sub_step = frame % interp_steps
         current_time = timestamps[main_frame]
@@ -707,6 +624,7 @@ def create_bar_animation(
         max_value = max(display_widths) if display_widths else 1
         offset = max(0.01, max_value * 0.03)
 
+        profiler.begin("text_layout")
         # dynamic label font size based on top_n
         if selected_attribute in ["track_name", "album_name"]:
             top_n_label_fontsize_mapping = {
@@ -736,9 +654,7 @@ def create_bar_animation(
                 text_objects[i].set_visible(False)
                 label_objects[i].set_visible(False)
                 artist_label_objects[i].set_visible(False)
-                if image_annotations[i]:
-                    image_annotations[i].remove()
-                    image_annotations[i] = None
+                remove_image_annotation(i)
             elif has_data:  # Only show elements for bars with data
                 text_objects[i].set_position((text_x + offset, bar_center_y))
                 text_objects[i].set_text(f"{interp_widths[i]:,.0f}")
@@ -788,8 +704,7 @@ def create_bar_animation(
                     artist_label_objects[i].set_visible(False)
 
                 # only update when necessary
-                cache_key = f"{name}_top_n_{top_n}"
-                img_data = image_cache.get(cache_key)
+                img_data = render_images.get(name)
 
                 if img_data and text_x > 0 and name:
                     needs_update = (
@@ -798,47 +713,45 @@ def create_bar_animation(
                     )
 
                     if needs_update:
-                        if image_annotations[i]:
-                            image_annotations[i].remove()
+                        remove_image_annotation(i)
 
                         img = img_data["img"]
                         xybox = top_n_xybox_mapping.get(top_n)
                         if img_data["color"]:
                             bars[i].set_facecolor(np.array(img_data["color"]) / 255)
 
-                        img_box = OffsetImage(img, zoom=1)
-                        image_annotations[i] = AnnotationBbox(
-                            img_box,
-                            (text_x, bar_center_y),
-                            xybox=xybox,
-                            xycoords="data",
-                            boxcoords="offset points",
-                            frameon=False,
-                            bboxprops=dict(
-                                boxstyle="round,pad=0.05",
-                                edgecolor="#A9A9A9",
-                                facecolor="#DCDCDC",
-                                linewidth=0.5,
-                            ),
-                        )
-                        ax.add_artist(image_annotations[i])
+                        with profiler.phase("annotation_churn"):
+                            img_box = OffsetImage(img, zoom=1)
+                            image_annotations[i] = AnnotationBbox(
+                                img_box,
+                                (text_x, bar_center_y),
+                                xybox=xybox,
+                                xycoords="data",
+                                boxcoords="offset points",
+                                frameon=False,
+                                bboxprops=dict(
+                                    boxstyle="round,pad=0.05",
+                                    edgecolor="#A9A9A9",
+                                    facecolor="#DCDCDC",
+                                    linewidth=0.5,
+                                ),
+                            )
+                            ax.add_artist(image_annotations[i])
                         image_annotations[i].cached_name = name
+                        profiler.wrap_draw(image_annotations[i], "draw_annotations")
                     else:
                         if image_annotations[i]:
                             image_annotations[i].xy = (
                                 text_x,
                                 bar_center_y,
                             )
-                elif image_annotations[i]:
-                    image_annotations[i].remove()
-                    image_annotations[i] = None
+                else:
+                    remove_image_annotation(i)
             else:
                 text_objects[i].set_visible(False)
                 label_objects[i].set_visible(False)
                 artist_label_objects[i].set_visible(False)
-                if image_annotations[i]:
-                    image_annotations[i].remove()
-                    image_annotations[i] = None
+                remove_image_annotation(i)
 
         # update the state for the next frame
         if sub_step == interp_steps - 1:
@@ -856,6 +769,12 @@ def create_bar_animation(
         year_text.set_text(f"{current_time.year}")
         month_text.set_text(f"{current_time.strftime('%B')}")
 
-    return animation.FuncAnimation(
+    anim = animation.FuncAnimation(
         fig, animate, frames=total_frames, interval=1, repeat=False
     )
+    # FuncAnimation asks for an idle redraw after every frame, which on the offscreen
+    # Agg canvas is a full draw; saving draws each frame again for the writer anyway
+    fig.canvas.draw_idle = lambda *args, **kwargs: None
+    # renders with stand-in art should not be kept as final results
+    anim.uses_placeholders = uses_placeholders
+    return anim
@@ -0,0 +1,107 @@
+"""
+This module keeps prebuilt figure skeletons for the static bar chart, so a render
+does not build the figure, title, logo and axes styling from scratch every time.
+
+A template is a matplotlib Figure created without pyplot (it is never registered
+with the pyplot figure manager, so nothing has to close it) that records the artists
+it was built with. A render acquires the template for its layout key, adds its data
+artists (bars, labels, images), saves the figure and releases it; release removes
+everything that was not part of the skeleton and keeps the figure for the next render
+with that key. Concurrent renders of the same key get separate figures.
+
+Idle templates are kept in LRU order, at most FIGURE_TEMPLATE_CACHE_SIZE of them.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from matplotlib.figure import Figure
+
+from modules.instrumentation import register_cache_stats
+
+FIGURE_TEMPLATE_CACHE_SIZE = int(os.environ.get("FIGURE_TEMPLATE_CACHE_SIZE", 10))
+
+
+def reset_figure(fig: Figure) -> None:
+    """Remove every artist added to fig since it was built as a template."""
+    for ax in fig.axes:
+        for container in list(ax.containers):
+            container.remove()
+    for parent in [fig, *fig.axes]:
+        for artist in parent.get_children():
+            if artist not in fig.static_artists:
+                artist.remove()
+
+
+class FigureTemplateCache:
+    """
+    Idle template figures by layout key, least recently used first.
+
+    Args:
+        max_templates: Idle figures kept across all keys.
+    """
+
+    def __init__(self, max_templates: int):
+        self.max_templates = max_templates
+        self._idle = OrderedDict()  # key -> [Figure]
+        self._count = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, key, build) -> Figure:
+        """
+        An idle template for key, or a new one from build() (a function returning
+        the skeleton Figure). The caller has it to itself until release().
+        """
+        with self._lock:
+            figures = self._idle.get(key)
+            if figures:
+                fig = figures.pop()
+                if not figures:
+                    del self._idle[key]
+                self._count -= 1
+                self.hits += 1
+                return fig
+            self.misses += 1
+        fig = build()
+        fig.template_key = key
+        fig.static_artists = {
+            artist for parent in [fig, *fig.axes] for artist in parent.get_children()
+        }
+        return fig
+
+    def release(self, fig: Figure) -> None:
+        """Strip the data artists from an acquired template and keep it for reuse."""
+        reset_figure(fig)
+        with self._lock:
+            self._idle.setdefault(fig.template_key, []).append(fig)
+            self._idle.move_to_end(fig.template_key)
+            self._count += 1
+            while self._count > self.max_templates:
+                key, figures = next(iter(self._idle.items()))
+                figures.pop(0)
+                if not figures:
+                    del self._idle[key]
+                self._count -= 1
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Idle templates and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": "figure_templates",
+                "entries": self._count,
+                "max_entries": self.max_templates,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+figure_templates = FigureTemplateCache(FIGURE_TEMPLATE_CACHE_SIZE)
+register_cache_stats(figure_templates.stats)
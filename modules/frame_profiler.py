@@ -0,0 +1,248 @@
+"""
+This module provides an opt-in profiler for the frames of the bar chart race, to see
+where the time of a slow animation goes. Each sampled frame is split into phases:
+
+    frame
+      interpolation        bar positions and widths for the frame
+      text_layout          value labels, names and date text
+        annotation_churn   creating and removing AnnotationBbox images
+      rasterization        Agg drawing of the figure (savefig)
+        draw_text, draw_bars, draw_annotations
+      encoding             writing the frame to ffmpeg, which blocks while the
+                           encoder catches up
+
+The profile is written in the folded stack format read by flamegraph.pl, speedscope
+and inferno (one "frame;phase;subphase microseconds" line per stack, self time only),
+next to a per-phase summary table.
+
+Set FRAME_PROFILE_DIR to profile every animation render into that directory, and
+FRAME_PROFILE_SAMPLE_EVERY to time only every n-th frame.
+"""
+
+import os
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+import numpy as np
+
+FRAME_PROFILE_DIR = os.environ.get("FRAME_PROFILE_DIR")
+FRAME_PROFILE_SAMPLE_EVERY = int(os.environ.get("FRAME_PROFILE_SAMPLE_EVERY", 1))
+
+_NULL_PHASE = nullcontext()
+
+
+class _Phase:
+    """One timed phase; nested phases add their time to children."""
+
+    __slots__ = ("profiler", "name", "path", "start", "children")
+
+    def __init__(self, profiler: "FrameProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.children = 0
+
+    def __enter__(self):
+        stack = self.profiler._stack
+        self.path = f"{stack[-1].path};{self.name}" if stack else self.name
+        stack.append(self)
+        self.profiler._order.setdefault(self.path, len(self.profiler._order))
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler._close(self, time.perf_counter_ns())
+
+
+class _TimedPipe:
+    """File wrapper recording writes to the ffmpeg pipe as the encoding phase."""
+
+    def __init__(self, pipe, profiler: "FrameProfiler"):
+        self._pipe = pipe
+        self._profiler = profiler
+
+    def write(self, data):
+        with self._profiler.phase("encoding"):
+            return self._pipe.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+
+class FrameProfiler:
+    """
+    Per-frame phase timings of one animation.
+
+    Args:
+        sample_every: Time every n-th frame; 0 disables the profiler, making every
+            call a no-op, so the animation code can call it unconditionally.
+    """
+
+    def __init__(self, sample_every: int = 1):
+        self.sample_every = sample_every
+        self.active = False
+        self.folded = defaultdict(int)  # stack -> self time in ns
+        self.frames = []  # per sampled frame: stack -> [inclusive ns, self ns]
+        self.flush_ns = 0
+        self._order = {}
+        self._stack = []
+        self._frame = None
+        self._segment = None
+        self._current = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_every > 0
+
+    def phase(self, name: str):
+        """Context manager timing a phase, nested under the open one."""
+        if not self.active:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def start_frame(self, frame: int) -> None:
+        """Close the previous frame and start timing this one if it is sampled."""
+        self.end_frame()
+        self.active = self.enabled and frame % self.sample_every == 0
+        if self.active:
+            self._current = {}
+            self._frame = self.phase("frame").__enter__()
+
+    def begin(self, name: str) -> None:
+        """End the open top-level phase of the frame and start the next one."""
+        self.end_segment()
+        if self.active:
+            self._segment = self.phase(name).__enter__()
+
+    def end_segment(self) -> None:
+        if self._segment is not None:
+            self._segment.__exit__(None, None, None)
+            self._segment = None
+
+    def end_frame(self) -> None:
+        self.end_segment()
+        if self._frame is not None:
+            self._frame.__exit__(None, None, None)
+            self._frame = None
+            self.frames.append(self._current)
+            self._current = None
+        self.active = False
+
+    def wrap_draw(self, artist, name: str) -> None:
+        """Time every draw of this artist (e.g. a Text or the Figure) as a phase."""
+        if not self.enabled:
+            return
+        draw = artist.draw
+
+        def timed_draw(renderer, *args, **kwargs):
+            with self.phase(name):
+                return draw(renderer, *args, **kwargs)
+
+        artist.draw = timed_draw
+
+    def instrument_writer(self, writer) -> None:
+        """
+        Time a matplotlib MovieWriter: the pipe writes of each frame become the
+        encoding phase, and the wait for ffmpeg in finish() is kept as a total.
+        """
+        if not self.enabled:
+            return
+        grab_frame, finish = writer.grab_frame, writer.finish
+
+        def timed_grab_frame(**savefig_kwargs):
+            self.end_segment()
+            pipe = writer._proc.stdin
+            writer._proc.stdin = _TimedPipe(pipe, self)
+            try:
+                grab_frame(**savefig_kwargs)
+            finally:
+                writer._proc.stdin = pipe
+
+        def timed_finish():
+            self.end_frame()
+            start = time.perf_counter_ns()
+            try:
+                finish()
+            finally:
+                self.flush_ns = time.perf_counter_ns() - start
+                self.folded["encoder_flush"] += self.flush_ns
+
+        writer.grab_frame = timed_grab_frame
+        writer.finish = timed_finish
+
+    def finish(self) -> None:
+        """Close the last frame; call once the animation has been saved."""
+        self.end_frame()
+
+    def summary(self) -> list:
+        """
+        Per phase (as a stack path): mean and p95 inclusive time, mean self time,
+        all in ms per sampled frame, and the share of frame time spent in the phase
+        itself.
+        """
+        if not self.frames:
+            return []
+        paths = sorted(
+            {path for frame in self.frames for path in frame}, key=self._tree_order
+        )
+        frame_ms = np.array([frame["frame"][0] for frame in self.frames]) / 1e6
+        rows = []
+        for path in paths:
+            times = np.array(
+                [frame.get(path, [0, 0]) for frame in self.frames], dtype=float
+            )
+            inclusive_ms, self_ms = times[:, 0] / 1e6, times[:, 1] / 1e6
+            rows.append(
+                {
+                    "phase": path,
+                    "mean_ms": round(float(inclusive_ms.mean()), 3),
+                    "p95_ms": round(float(np.percentile(inclusive_ms, 95)), 3),
+                    "self_ms": round(float(self_ms.mean()), 3),
+                    "self_share": round(float(self_ms.sum() / frame_ms.sum()), 4),
+                }
+            )
+        return rows
+
+    def format_summary(self) -> str:
+        """The summary as a text table, nested phases indented under their parent."""
+        lines = [
+            f"{len(self.frames)} sampled frames "
+            f"(every {self.sample_every}), encoder flush {self.flush_ns / 1e9:.2f}s",
+            f"{'phase':<28} {'mean ms':>9} {'p95 ms':>9} {'self ms':>9} {'self %':>7}",
+        ]
+        for row in self.summary():
+            depth = row["phase"].count(";")
+            name = "  " * depth + row["phase"].rsplit(";", 1)[-1]
+            lines.append(
+                f"{name:<28} {row['mean_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                f"{row['self_ms']:>9.2f} {row['self_share']:>7.1%}"
+            )
+        return "\n".join(lines)
+
+    def write(self, directory: str, name: str) -> tuple:
+        """Write name.folded and name_summary.txt; returns their paths."""
+        os.makedirs(directory, exist_ok=True)
+        folded_path = os.path.join(directory, f"{name}.folded")
+        summary_path = os.path.join(directory, f"{name}_summary.txt")
+        with open(folded_path, "w") as f:
+            for path, ns in sorted(self.folded.items()):
+                f.write(f"{path} {ns // 1000}\n")
+        with open(summary_path, "w") as f:
+            f.write(self.format_summary() + "\n")
+        return folded_path, summary_path
+
+    def _tree_order(self, path: str) -> list:
+        """Sort key listing each phase under its parent, in the order they ran."""
+        names = path.split(";")
+        return [self._order[";".join(names[: i + 1])] for i in range(len(names))]
+
+    def _close(self, phase: _Phase, end: int) -> None:
+        total = end - phase.start
+        self._stack.pop()
+        self.folded[phase.path] += total - phase.children
+        if self._stack:
+            self._stack[-1].children += total
+        if self._current is not None:
+            times = self._current.setdefault(phase.path, [0, 0])
+            times[0] += total
+            times[1] += total - phase.children
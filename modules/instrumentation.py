@@ -0,0 +1,195 @@
+"""
+This module measures where the time and memory of a request (an upload or a render
+job) go. The request is wrapped in request_profile() and its steps in stage(), e.g.
+ingestion, aggregation, image acquisition, layout, rendering and encoding. Each stage
+records its wall time, the CPU time of the calling thread and the peak RSS of the
+process while it ran; stages may be nested. The finished profile also holds the hit
+ratios of every registered cache during the request, and is printed as one JSON log
+line for structured logging.
+
+stage() is a no-op outside a request profile, and can also be used as a decorator.
+"""
+
+import contextvars
+import itertools
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import psutil
+
+MB = 1024 * 1024
+RSS_SAMPLE_SECONDS = 0.05
+
+_current_profile = contextvars.ContextVar("current_profile", default=None)
+_process = psutil.Process()
+_cache_sources = []
+
+
+def register_cache_stats(stats_fn) -> None:
+    """
+    Include caches in request profiles. stats_fn returns a stats dict (or a list of
+    them) with name, hits and misses, like BoundedCache.stats().
+    """
+    _cache_sources.append(stats_fn)
+
+
+def cache_counters() -> dict:
+    """
+    Current (hits, misses) of every registered cache by name, summed over sources
+    reporting the same name (e.g. a cache and its copies in render workers).
+    """
+    counters = {}
+    for stats_fn in _cache_sources:
+        stats = stats_fn()
+        for cache in stats if isinstance(stats, list) else [stats]:
+            hits, misses = counters.get(cache["name"], (0, 0))
+            counters[cache["name"]] = (hits + cache["hits"], misses + cache["misses"])
+    return counters
+
+
+class RssSampler:
+    """
+    Background thread sampling the process RSS while any stage is running, so each
+    stage can report the peak it reached rather than only its start and end values.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self._peaks = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+
+    def start(self) -> int:
+        """Begin tracking a peak; returns the token to pass to stop()."""
+        rss = _process.memory_info().rss
+        with self._lock:
+            token = next(self._tokens)
+            self._peaks[token] = rss
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="rss-sampler", daemon=True
+                )
+                self._thread.start()
+            self._active.set()
+        return token
+
+    def stop(self, token: int) -> int:
+        """Peak RSS in bytes since the matching start()."""
+        rss = _process.memory_info().rss
+        with self._lock:
+            return max(self._peaks.pop(token), rss)
+
+    def _run(self) -> None:
+        while True:
+            self._active.wait()
+            rss = _process.memory_info().rss
+            with self._lock:
+                if not self._peaks:
+                    self._active.clear()
+                    continue
+                for token, peak in self._peaks.items():
+                    self._peaks[token] = max(peak, rss)
+            time.sleep(self.interval)
+
+
+rss_sampler = RssSampler()
+
+
+class RequestProfile:
+    """Stages, totals and cache hit ratios of one request."""
+
+    def __init__(self, name: str, **metadata):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.metadata = metadata
+        self.started_at = time.time()
+        self.status = "running"
+        self.stages = []
+        self.wall_s = None
+        self.cpu_s = None
+        self.peak_rss_mb = None
+        self.caches = {}
+        self._depth = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "metadata": self.metadata,
+            "started_at": self.started_at,
+            "status": self.status,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "peak_rss_mb": self.peak_rss_mb,
+            "stages": self.stages,
+            "caches": self.caches,
+        }
+
+
+def current_profile() -> RequestProfile:
+    """Profile of the request running in this context, or None."""
+    return _current_profile.get()
+
+
+@contextmanager
+def request_profile(name: str, **metadata):
+    """
+    Profile the block as one request; yields the RequestProfile. The profile is
+    logged as JSON when the block exits, whether or not it raised.
+    """
+    profile = RequestProfile(name, **metadata)
+    context_token = _current_profile.set(profile)
+    caches_before = cache_counters()
+    rss_token = rss_sampler.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield profile
+        profile.status = "done"
+    except BaseException:
+        profile.status = "failed"
+        raise
+    finally:
+        profile.wall_s = round(time.perf_counter() - wall_start, 4)
+        profile.cpu_s = round(time.thread_time() - cpu_start, 4)
+        profile.peak_rss_mb = round(rss_sampler.stop(rss_token) / MB, 1)
+        for cache_name, (hits, misses) in cache_counters().items():
+            hits_before, misses_before = caches_before.get(cache_name, (0, 0))
+            lookups = hits - hits_before + misses - misses_before
+            if lookups:
+                profile.caches[cache_name] = {
+                    "hits": hits - hits_before,
+                    "misses": misses - misses_before,
+                    "hit_ratio": round((hits - hits_before) / lookups, 3),
+                }
+        _current_profile.reset(context_token)
+        print(json.dumps({"event": "request_profile", **profile.to_dict()}))
+
+
+@contextmanager
+def stage(name: str):
+    """Record the block as a stage of the current request profile, if any."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    # appended up front so that nested stages are listed after their parent
+    record = {"stage": name, "depth": profile._depth}
+    profile.stages.append(record)
+    profile._depth += 1
+    rss_token = rss_sampler.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        record["wall_s"] = round(time.perf_counter() - wall_start, 4)
+        record["cpu_s"] = round(time.thread_time() - cpu_start, 4)
+        record["peak_rss_mb"] = round(rss_sampler.stop(rss_token) / MB, 1)
+        profile._depth -= 1
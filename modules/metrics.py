@@ -0,0 +1,112 @@
+"""
+This module exports Prometheus metrics for the render and image fetch pipelines:
+render durations by kind, frames rendered, Spotify API calls by outcome (including
+429s), cache hits and misses, the render queue depth and the size of uploads.
+
+Counters and histograms are updated where the events happen. Cache and queue
+figures are read from the existing counters when Prometheus scrapes, so the hot
+paths are not touched. Set METRICS_PORT to serve /metrics on that port, or use
+metrics_text() for a text dump in the Prometheus exposition format.
+"""
+
+import os
+
+from prometheus_client import (
+    REGISTRY,
+    Counter,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from modules.admission import admission
+from modules.instrumentation import cache_counters
+from modules.resources import resource
+
+MB = 1024 * 1024
+
+# 0 disables the metrics server
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+METRICS_ADDR = os.environ.get("METRICS_ADDR", "127.0.0.1")
+
+RENDER_SECONDS = Histogram(
+    "spotify_render_duration_seconds",
+    "Time from a render getting its slot to finishing, by kind and status.",
+    ["kind", "status"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200),
+)
+FRAMES_RENDERED = Counter("spotify_frames_rendered", "Animation frames rendered.")
+SPOTIFY_CALLS = Counter(
+    "spotify_api_calls",
+    "Spotify Web API calls by outcome (ok, rate_limited, client_error, "
+    "server_error, connection_error, error).",
+    ["outcome"],
+)
+INGEST_BYTES = Histogram(
+    "spotify_ingest_bytes",
+    "Size of uploaded streaming history ZIPs.",
+    buckets=tuple(size * MB for size in (1, 5, 10, 25, 50, 100, 250, 500)),
+)
+INGEST_PLAYS = Histogram(
+    "spotify_ingest_plays",
+    "Plays in uploaded streaming histories after cleaning.",
+    buckets=(1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6),
+)
+
+
+class PipelineStateCollector:
+    """Cache and render queue metrics, read from their own counters at scrape time."""
+
+    def collect(self):
+        hits = CounterMetricFamily(
+            "spotify_cache_hits", "Cache hits by cache.", labels=["cache"]
+        )
+        misses = CounterMetricFamily(
+            "spotify_cache_misses", "Cache misses by cache.", labels=["cache"]
+        )
+        for name, (cache_hits, cache_misses) in cache_counters().items():
+            hits.add_metric([name], cache_hits)
+            misses.add_metric([name], cache_misses)
+
+        stats = admission.stats()
+        waiting = GaugeMetricFamily(
+            "spotify_render_queue_depth",
+            "Renders waiting for a render slot, by kind.",
+            labels=["kind"],
+        )
+        running = GaugeMetricFamily(
+            "spotify_renders_running", "Renders running, by kind.", labels=["kind"]
+        )
+        for kind, count in stats["waiting"].items():
+            waiting.add_metric([kind], count)
+        for kind, count in stats["running"].items():
+            running.add_metric([kind], count)
+        rejected = CounterMetricFamily(
+            "spotify_renders_rejected", "Renders rejected because the queue was full."
+        )
+        rejected.add_metric([], stats["rejected"])
+        return [hits, misses, waiting, running, rejected]
+
+
+REGISTRY.register(PipelineStateCollector())
+
+
+def record_ingest(zip_bytes: int, plays: int) -> None:
+    """Record the size of an uploaded history."""
+    INGEST_BYTES.observe(zip_bytes)
+    INGEST_PLAYS.observe(plays)
+
+
+@resource
+def start_metrics_server() -> int:
+    """Serve /metrics on METRICS_PORT once per process; returns the port (0: off)."""
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT, addr=METRICS_ADDR)
+        print(f"Serving Prometheus metrics on {METRICS_ADDR}:{METRICS_PORT}")
+    return METRICS_PORT
+
+
+def metrics_text() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return generate_latest(REGISTRY).decode("utf-8")
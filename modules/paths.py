@@ -0,0 +1,8 @@
+"""
+This module holds the repository root directory, for modules that locate files
+relative to it. It imports nothing heavy, so the startup path can use it.
+"""
+
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
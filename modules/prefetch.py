@@ -0,0 +1,112 @@
+"""
+This module warms the image cache in the background as soon as a dataset is uploaded.
+The most played artists, songs and albums are already known at that point, so their
+images can be fetched while the user is still choosing display options.
+"""
+
+import threading
+
+import pandas as pd
+
+from modules.prepare_visuals import image_cache, preload_images_batch
+
+# the slider allows up to 10 items, so warm the 10 most played entities per view
+PREFETCH_TOP_N = 10
+# large enough for every animation layout and most static layouts (300px variant)
+PREFETCH_TARGET_SIZE = 250
+
+ATTRIBUTE_ITEM_TYPES = {
+    "artist_name": "artist",
+    "track_name": "track",
+    "album_name": "album",
+}
+
+
+def top_candidates(
+    df: pd.DataFrame, selected_attribute: str, top_n: int = PREFETCH_TOP_N
+) -> pd.DataFrame:
+    """
+    Find the entities most likely to be displayed for an attribute over the full date
+    range, ranked by streams and by time listened.
+
+    Returns:
+        pd.DataFrame: One row per candidate with the attribute and a track_uri.
+    """
+    keys = (
+        ["artist_name"]
+        if selected_attribute == "artist_name"
+        else [selected_attribute, "artist_name"]
+    )
+    by_streams = df.groupby(keys).size().nlargest(top_n).reset_index()
+    by_duration = df.groupby(keys)["duration_ms"].sum().nlargest(top_n).reset_index()
+
+    candidates = pd.concat([by_streams[keys], by_duration[keys]]).drop_duplicates(
+        subset=selected_attribute
+    )
+    track_uri_mapping = df.groupby(selected_attribute)["track_uri"].first()
+    candidates["track_uri"] = candidates[selected_attribute].map(track_uri_mapping)
+    return candidates.reset_index(drop=True)
+
+
+class ImagePrefetcher:
+    """
+    Background thread fetching images for the top candidates of each attribute.
+    All Spotify calls go through the shared rate limiter in prepare_visuals.
+    """
+
+    def __init__(self, candidates: dict, target_size: int = PREFETCH_TARGET_SIZE):
+        self.candidates = candidates
+        self.target_size = target_size
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="image-prefetch", daemon=True
+        )
+
+    def start(self) -> "ImagePrefetcher":
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        """
+        Ask the prefetch to stop: a wait for the rate limiter ends at once, other
+        work stops at the next API call or download.
+        """
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def _run(self) -> None:
+        for selected_attribute, candidates_df in self.candidates.items():
+            if self.cancelled:
+                return
+            try:
+                preload_images_batch(
+                    candidates_df[selected_attribute].tolist(),
+                    candidates_df,
+                    selected_attribute,
+                    ATTRIBUTE_ITEM_TYPES[selected_attribute],
+                    self.target_size,
+                    image_cache,
+                    cancel_event=self._cancel_event,
+                )
+            except Exception as e:
+                print(f"Image prefetch failed for {selected_attribute}: {e}")
+
+
+def start_prefetch(df: pd.DataFrame, top_n: int = PREFETCH_TOP_N) -> ImagePrefetcher:
+    """
+    Start warming the image cache for a freshly uploaded dataset.
+    Candidates are computed up front, so the background thread never reads df.
+    The default artist view is fetched first, then songs and albums.
+    """
+    candidates = {
+        selected_attribute: top_candidates(df, selected_attribute, top_n)
+        for selected_attribute in ATTRIBUTE_ITEM_TYPES
+    }
+    return ImagePrefetcher(candidates).start()
@@ -4,37 +4,205 @@ including fetching images, extracting dominant colors, and setting up plot style
 """
 
 import colorsys
+import hashlib
 import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
 from io import BytesIO
 from typing import Dict, List
 
 import matplotlib.pyplot as plt
+import requests
 import spotipy
-import streamlit as st
-from colorthief import ColorThief
-from matplotlib.font_manager import FontProperties
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont
 from spotipy.oauth2 import SpotifyClientCredentials
 
-# global caches and eror tracking
-color_cache = {}
-image_cache = {}
-error_logged = set()
+from modules.cache import BoundedCache, estimate_size
+from modules.circuit_breaker import CircuitBreaker, CircuitOpenError
+from modules.color_extraction import dominant_color
+from modules.config import get_secret
+from modules.instrumentation import register_cache_stats
+from modules.metrics import SPOTIFY_CALLS
+from modules.rate_limiter import RateLimiter
+from modules.resources import resource
+
+MB = 1024 * 1024
+
+# global caches and eror tracking, shared by every session and download thread
+# image_cache holds one decoded original per entity name: {"img", "color"} or None
+color_cache = BoundedCache("color_cache", max_bytes=1 * MB)
+image_cache = BoundedCache("image_cache", max_bytes=256 * MB)
+error_logged = BoundedCache("error_logged", max_bytes=1 * MB)
+
+# resized variants derived from image_cache, keyed by (name, target_size);
+# values are (original, resized) and only the resized image counts to the budget
+image_variants = BoundedCache(
+    "image_variants",
+    max_bytes=64 * MB,
+    sizeof=lambda variant: estimate_size(variant[1]),
+)
+
+_NOT_CACHED = object()
 
-# load environment variables
-client_id = st.secrets["SPOTIFY_CLIENT_ID"]
-client_secret = st.secrets["SPOTIFY_CLIENT_SECRET"]
+# colors are extracted from a small thumbnail of the original, once per entity
+COLOR_SAMPLE_SIZE = 128
 
-client_credentials_manager = SpotifyClientCredentials(
-    client_id=client_id, client_secret=client_secret
+PLACEHOLDER_FONT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "fonts", "Montserrat-Bold.ttf"
 )
-sp = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
 
+# shared by every thread calling the Spotify API (renders and background prefetch)
+spotify_rate_limiter = RateLimiter(calls_per_second=10)
+MAX_RATE_LIMIT_RETRIES = 3
+
+# renders wait at most this long for images, then fall back to placeholder art
+IMAGE_DEADLINE_SECONDS = 15
+
+
+# after 5 consecutive failures calls are rejected for 30s, then a probe is let through
+spotify_breaker = CircuitBreaker("spotify_api", failure_threshold=5, reset_timeout=30)
+cdn_breaker = CircuitBreaker("image_cdn", failure_threshold=5, reset_timeout=30)
+
+
+class ImageDeadlineExceeded(Exception):
+    """Raised when a Spotify call cannot complete before the image deadline."""
+
+    def __init__(self):
+        super().__init__("image deadline reached")
+
+
+class ImageFetchCancelled(Exception):
+    """Raised when a Spotify call is abandoned because its work was cancelled."""
+
+    def __init__(self):
+        super().__init__("image fetch cancelled")
+
+
+# calls skipped for these reasons leave entities unresolved (placeholder art)
+SKIPPED_CALL_ERRORS = (ImageDeadlineExceeded, ImageFetchCancelled, CircuitOpenError)
+
+
+@resource
+def get_spotify_client() -> spotipy.Spotify:
+    """
+    Shared Spotify client, created on first use. Credentials are resolved by
+    modules/config.py (environment, config file, then st.secrets).
+    """
+    client_credentials_manager = SpotifyClientCredentials(
+        client_id=get_secret("SPOTIFY_CLIENT_ID"),
+        client_secret=get_secret("SPOTIFY_CLIENT_SECRET"),
+    )
+    # 429s are not retried inside spotipy (which would sleep for the whole
+    # Retry-After) but surfaced to _spotify_call, where retries are bounded by the
+    # render deadline
+    return spotipy.Spotify(
+        client_credentials_manager=client_credentials_manager,
+        status_forcelist=(500, 502, 503, 504),
+    )
+
+
+def set_spotify_client(client: spotipy.Spotify) -> None:
+    """Replace the Spotify client, e.g. with one pointed at a local stand-in API."""
+    get_spotify_client.set(client)
+
+
+def _spotify_call(
+    method,
+    *args,
+    deadline: float = None,
+    cancel_event: threading.Event = None,
+    **kwargs,
+):
+    """
+    Call a Spotify client method through the shared rate limiter and circuit breaker.
+    Rate limited calls are retried a bounded number of times, and only while the
+    Retry-After wait still fits before the deadline (a time.monotonic() value).
+    Setting cancel_event interrupts the wait for the limiter, including a Retry-After
+    pause, and raises ImageFetchCancelled.
+    Server errors, connection errors, exhausted retries and unexpected exceptions count
+    as breaker failures; other client errors (e.g. 404) show the API is responsive and
+    count as successes.
+    """
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        if not spotify_rate_limiter.acquire(cancel_event, deadline):
+            if cancel_event is not None and cancel_event.is_set():
+                raise ImageFetchCancelled()
+            raise ImageDeadlineExceeded()
+        if not spotify_breaker.allow_request():
+            raise CircuitOpenError(f"{spotify_breaker.name} circuit is open")
+        try:
+            result = method(*args, **kwargs)
+        except spotipy.exceptions.SpotifyException as e:
+            # spotipy reports exhausted 5xx retries as a 429 without Retry-After
+            headers = e.headers or {}
+            rate_limited = e.http_status == 429 and "Retry-After" in headers
+            if rate_limited:
+                SPOTIFY_CALLS.labels("rate_limited").inc()
+            elif e.http_status == 429 or e.http_status >= 500:
+                SPOTIFY_CALLS.labels("server_error").inc()
+            else:
+                SPOTIFY_CALLS.labels("client_error").inc()
+            if rate_limited and attempt < MAX_RATE_LIMIT_RETRIES:
+                spotify_breaker.record_success()
+                retry_after = int(headers["Retry-After"])
+                print(f"Spotify Rate Limit: Retrying after {retry_after} seconds...")
+                spotify_rate_limiter.pause(retry_after)
+                continue
+            if e.http_status == 429 or e.http_status >= 500:
+                spotify_breaker.record_failure()
+            else:
+                spotify_breaker.record_success()
+            raise
+        except requests.RequestException:
+            SPOTIFY_CALLS.labels("connection_error").inc()
+            spotify_breaker.record_failure()
+            raise
+        except Exception:
+            # anything else (e.g. a malformed response) must still settle a probe
+            SPOTIFY_CALLS.labels("error").inc()
+            spotify_breaker.record_failure()
+            raise
+        SPOTIFY_CALLS.labels("ok").inc()
+        spotify_breaker.record_success()
+        return result
+
+
+def select_image_url(images: List[Dict], target_size: int = None) -> str:
+    """
+    Pick the smallest image variant at least target_size pixels on its short side.
 
-def fetch_images_batch(items_data: List[Dict]) -> Dict[str, str]:
+    Spotify lists each image in several sizes (typically 640, 300 and 64 px).
+    Falls back to the largest variant when none is big enough or sizes are unknown.
+    """
+    if not images:
+        return None
+    if target_size is None:
+        return images[0]["url"]
+
+    def short_side(image: Dict) -> int:
+        return min(image.get("width") or 0, image.get("height") or 0)
+
+    largest = max(images, key=short_side)
+    sufficient = [image for image in images if short_side(image) >= target_size]
+    if not sufficient:
+        return largest["url"]
+    return min(sufficient, key=short_side)["url"]
+
+
+def fetch_images_batch(
+    items_data: List[Dict],
+    target_size: int = None,
+    deadline: float = None,
+    cancel_event: threading.Event = None,
+) -> Dict[str, str]:
     """
     Fetch images in batches using Spotify's batch endpoints.
+    target_size selects the smallest sufficient image variant to download.
+    Batches that cannot be fetched before the deadline, or once cancel_event is set,
+    are skipped.
     """
     image_urls = {}
 
@@ -52,12 +220,16 @@ def fetch_images_batch(items_data: List[Dict]) -> Dict[str, str]:
 
     if tracks:
         track_uris = [item["track_uri"] for item in tracks]
-        track_images = _fetch_tracks_batch(track_uris)
+        track_images = _fetch_tracks_batch(
+            track_uris, target_size, deadline, cancel_event
+        )
         image_urls.update(track_images)
 
     if albums:
         track_uris = [item["track_uri"] for item in albums]
-        album_images = _fetch_tracks_batch(track_uris)
+        album_images = _fetch_tracks_batch(
+            track_uris, target_size, deadline, cancel_event
+        )
         for item in albums:
             track_uri = item["track_uri"]
             if track_uri in album_images:
@@ -65,13 +237,20 @@ def fetch_images_batch(items_data: List[Dict]) -> Dict[str, str]:
                 image_urls[album_name] = album_images[track_uri]
 
     if artists:
-        artist_images = _fetch_artists_from_tracks_batch(artists)
+        artist_images = _fetch_artists_from_tracks_batch(
+            artists, target_size, deadline, cancel_event
+        )
         image_urls.update(artist_images)
 
     return image_urls
 
 
-def _fetch_artists_from_tracks_batch(artist_items: List[Dict]) -> Dict[str, str]:
+def _fetch_artists_from_tracks_batch(
+    artist_items: List[Dict],
+    target_size: int = None,
+    deadline: float = None,
+    cancel_event: threading.Event = None,
+) -> Dict[str, str]:
     """
     Fetch artist images using track URIs in batches.
     Step 1: Get track info (batch) then extract artist IDs
@@ -107,7 +286,12 @@ def _fetch_artists_from_tracks_batch(artist_items: List[Dict]) -> Dict[str, str]
             print(
                 f"🚀 Fetching track batch {i // 50 + 1}: {len(batch_track_ids)} tracks"
             )
-            tracks_response = sp.tracks(batch_track_ids)
+            tracks_response = _spotify_call(
+                get_spotify_client().tracks,
+                batch_track_ids,
+                deadline=deadline,
+                cancel_event=cancel_event,
+            )
             tracks_api_calls += 1
 
             for j, track in enumerate(tracks_response["tracks"]):
@@ -122,8 +306,9 @@ def _fetch_artists_from_tracks_batch(artist_items: List[Dict]) -> Dict[str, str]
                             all_artist_ids.append(artist_id)
                             break
 
-            time.sleep(0.1)
-
+        except SKIPPED_CALL_ERRORS as e:
+            print(f"Skipping remaining track batches: {e}")
+            return image_urls
         except Exception as e:
             print(f"Batch tracks API failed: {e}")
             continue
@@ -136,7 +321,12 @@ def _fetch_artists_from_tracks_batch(artist_items: List[Dict]) -> Dict[str, str]
             batch_artist_ids = unique_artist_ids[i : i + 50]
 
             try:
-                artists_response = sp.artists(batch_artist_ids)
+                artists_response = _spotify_call(
+                    get_spotify_client().artists,
+                    batch_artist_ids,
+                    deadline=deadline,
+                    cancel_event=cancel_event,
+                )
                 artists_api_calls += 1
 
                 for artist in artists_response["artists"]:
@@ -144,90 +334,124 @@ def _fetch_artists_from_tracks_batch(artist_items: List[Dict]) -> Dict[str, str]
                         artist_id = artist["id"]
                         artist_name = artist_id_to_name.get(artist_id)
                         if artist_name:
-                            image_url = artist["images"][0]["url"]
+                            image_url = select_image_url(artist["images"], target_size)
                             image_urls[artist_name] = image_url
 
-                time.sleep(0.1)
-
+            except SKIPPED_CALL_ERRORS as e:
+                print(f"Skipping remaining artist batches: {e}")
+                break
             except Exception as e:
                 print(f"Batch artists API failed: {e}")
                 continue
     return image_urls
 
 
-def _fetch_tracks_batch(track_uris: List[str]) -> Dict[str, str]:
+def _fetch_tracks_batch(
+    track_uris: List[str],
+    target_size: int = None,
+    deadline: float = None,
+    cancel_event: threading.Event = None,
+) -> Dict[str, str]:
     """Fetch track images in batches of 50"""
     image_urls = {}
 
     for i in range(0, len(track_uris), 50):
         batch = track_uris[i : i + 50]
         try:
-            tracks_response = sp.tracks(batch)
+            tracks_response = _spotify_call(
+                get_spotify_client().tracks,
+                batch,
+                deadline=deadline,
+                cancel_event=cancel_event,
+            )
             for track in tracks_response["tracks"]:
                 if track and track["album"].get("images"):
-                    image_urls[track["uri"]] = track["album"]["images"][0]["url"]
+                    image_urls[track["uri"]] = select_image_url(
+                        track["album"]["images"], target_size
+                    )
+        except SKIPPED_CALL_ERRORS as e:
+            print(f"Skipping remaining track batches: {e}")
+            break
         except spotipy.exceptions.SpotifyException as e:
-            if e.http_status == 429:
-                retry_after = int(e.headers.get("Retry-After", 5))
-                print(f"Spotify Rate Limit: Retrying after {retry_after} seconds...")
-                time.sleep(retry_after)
-                # Retry this batch
-                return _fetch_tracks_batch(track_uris[i:])
             print(f"Error fetching tracks batch: {e}")
-        time.sleep(0.1)
+        except requests.RequestException as e:
+            # the batch stays unresolved (placeholder art); try the next one
+            print(f"Connection error fetching tracks batch: {e}")
+        except Exception as e:
+            print(f"Batch tracks API failed: {e}")
     return image_urls
 
 
-def _fetch_albums_batch(album_ids: List[str]) -> Dict[str, str]:
+def _fetch_albums_batch(
+    album_ids: List[str],
+    target_size: int = None,
+    deadline: float = None,
+    cancel_event: threading.Event = None,
+) -> Dict[str, str]:
     """Fetch album images in batches of 20"""
     image_urls = {}
 
     for i in range(0, len(album_ids), 20):
         batch = album_ids[i : i + 20]
         try:
-            albums_response = sp.albums(batch)
+            albums_response = _spotify_call(
+                get_spotify_client().albums,
+                batch,
+                deadline=deadline,
+                cancel_event=cancel_event,
+            )
             for album in albums_response["albums"]:
                 if album and album.get("images"):
-                    image_urls[album["id"]] = album["images"][0]["url"]
+                    image_urls[album["id"]] = select_image_url(
+                        album["images"], target_size
+                    )
+        except SKIPPED_CALL_ERRORS as e:
+            print(f"Skipping remaining album batches: {e}")
+            break
         except spotipy.exceptions.SpotifyException as e:
-            if e.http_status == 429:
-                retry_after = int(e.headers.get("Retry-After", 5))
-                print(f"Spotify Rate Limit: Retrying after {retry_after} seconds...")
-                time.sleep(retry_after)
-                return _fetch_albums_batch(album_ids[i:])
             print(f"Error fetching albums batch: {e}")
-        time.sleep(0.1)
+        except requests.RequestException as e:
+            # the batch stays unresolved (placeholder art); try the next one
+            print(f"Connection error fetching albums batch: {e}")
+        except Exception as e:
+            print(f"Batch albums API failed: {e}")
     return image_urls
 
 
 def fetch_image(
-    item_name: str, item_type: str, artist_name: str = None, track_uri: str = None
+    item_name: str,
+    item_type: str,
+    artist_name: str = None,
+    track_uri: str = None,
+    target_size: int = None,
+    deadline: float = None,
+    cancel_event: threading.Event = None,
 ) -> str:
     """Fetches the image using track_uri for tracks/albums, or search for artists."""
     try:
         if item_type == "artist":
-            result = sp.search(q=f"artist:{item_name}", type="artist", limit=1)
+            result = _spotify_call(
+                get_spotify_client().search,
+                q=f"artist:{item_name}",
+                type="artist",
+                limit=1,
+                deadline=deadline,
+                cancel_event=cancel_event,
+            )
             if result["artists"]["items"]:
                 images = result["artists"]["items"][0].get("images", [])
-                return images[0]["url"] if images else None
+                return select_image_url(images, target_size)
 
         elif item_type in ["track"] and track_uri:
             try:
-                track = sp.track(track_uri)
-                return (
-                    track["album"]["images"][0]["url"]
-                    if track["album"].get("images")
-                    else None
+                track = _spotify_call(
+                    get_spotify_client().track,
+                    track_uri,
+                    deadline=deadline,
+                    cancel_event=cancel_event,
                 )
+                return select_image_url(track["album"].get("images"), target_size)
             except spotipy.exceptions.SpotifyException as e:
-                if e.http_status == 429:  # Rate limit error
-                    retry_after = int(e.headers.get("Retry-After", 5))
-                    print(f"Rate limit hit. Retrying after {retry_after} seconds...")
-                    print(
-                        f"Spotify Rate Limit: Retrying after {retry_after} seconds..."
-                    )
-                    time.sleep(retry_after)
-                    return fetch_image(item_name, item_type, artist_name, track_uri)
                 print(f"Spotify API error: {e}")
                 return None
 
@@ -235,13 +459,23 @@ def fetch_image(
             query = f"album:{item_name}" + (
                 f" artist:{artist_name}" if artist_name else ""
             )
-            result = sp.search(q=query, type="album", limit=1)
+            result = _spotify_call(
+                get_spotify_client().search,
+                q=query,
+                type="album",
+                limit=1,
+                deadline=deadline,
+                cancel_event=cancel_event,
+            )
             if result["albums"]["items"]:
                 images = result["albums"]["items"][0].get("images", [])
-                return images[0]["url"] if images else None
+                return select_image_url(images, target_size)
 
         return None
 
+    except SKIPPED_CALL_ERRORS as e:
+        print(f"Skipped fetching image for {item_name} ({item_type}): {e}")
+        return None
     except (KeyError, IndexError) as e:
         print(f"Data error fetching image for {item_name} ({item_type}): {str(e)}")
         return None
@@ -252,68 +486,288 @@ def fetch_image(
         return None
 
 
-def get_dominant_color(img: Image, img_name: str) -> tuple:
+def preload_images_batch(
+    names,
+    monthly_df,
+    selected_attribute,
+    item_type,
+    target_size=200,
+    cache=image_cache,
+    cancel_event: threading.Event = None,
+    timeout: float = None,
+) -> None:
+    """
+    Preload images using batch API + parallel downloads.
+    Entities already cached at a sufficient resolution are skipped.
+    Setting cancel_event stops the work, including waits for the rate limiter,
+    without caching anything for the entities that were not fetched.
+
+    With a timeout (seconds), the call returns by then at the latest. Entities not
+    resolved in time stay uncached, so renders draw placeholder art for them;
+    downloads still in flight keep running and fill the cache for later renders.
     """
-    Extracts a vibrant dominant color from an image using ColorThief, avoiding greys.
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    breaker_before = (spotify_breaker.rejected, spotify_breaker.failures)
+
+    def cancelled() -> bool:
+        return cancel_event is not None and cancel_event.is_set()
+
+    def expired() -> bool:
+        return deadline is not None and time.monotonic() >= deadline
+
+    items_to_fetch = []
+
+    for name in names:
+        if _needs_download(cache, name, target_size):
+            matching_rows = monthly_df[monthly_df[selected_attribute] == name]
+            if not matching_rows.empty:
+                row = matching_rows.iloc[0]
+                item_data = {"name": name, "type": item_type}
+
+                if "track_uri" in row and row["track_uri"]:
+                    item_data["track_uri"] = row["track_uri"]
+                else:
+                    if item_type == "artist":
+                        item_data["artist_name"] = name
+                        item_data["search_required"] = True
+
+                items_to_fetch.append(item_data)
+
+    if not items_to_fetch:
+        return
+
+    # batch API calls
+    batch_items = [item for item in items_to_fetch if not item.get("search_required")]
+    search_items = [item for item in items_to_fetch if item.get("search_required")]
+    batch_results = {}
+    lookup_failed = False
+
+    if batch_items:
+        try:
+            batch_results = fetch_images_batch(
+                batch_items, target_size, deadline, cancel_event
+            )
+        except Exception as e:
+            # the entities stay uncached, so the render draws placeholder art
+            print(f"Batch image lookup failed: {e}")
+            lookup_failed = True
+    for item in search_items:
+        if cancelled() or expired():
+            break
+        try:
+            image_url = fetch_image(
+                item["name"],
+                "artist",
+                target_size=target_size,
+                deadline=deadline,
+                cancel_event=cancel_event,
+            )
+            if image_url:
+                batch_results[item["name"]] = image_url
+        except Exception as e:
+            print(f"Search failed for {item['name']}: {e}")
+
+    if cancelled():
+        return
+    # lookups may have been cut short by the deadline, API failures or an open
+    # circuit, in which case a missing URL no longer means "no image"
+    breaker_after = (spotify_breaker.rejected, spotify_breaker.failures)
+    lookups_complete = not (
+        lookup_failed or expired() or breaker_after != breaker_before
+    )
+
+    # prepare download tasks
+    download_tasks = []
+    for item in items_to_fetch:
+        image_url = None
+        if item["type"] == "track":
+            image_url = batch_results.get(item.get("track_uri")) or batch_results.get(
+                item["name"]
+            )
+        elif item["type"] == "album":
+            image_url = batch_results.get(item["name"])
+        elif item["type"] == "artist":
+            image_url = batch_results.get(item["name"])
+
+        if image_url:
+            download_tasks.append(
+                {
+                    "name": item["name"],
+                    "image_url": image_url,
+                    "target_size": target_size,
+                    "cache": cache,
+                    "cancel_event": cancel_event,
+                }
+            )
+        elif lookups_complete:
+            print(f"No image URL found for {item['name']} (type: {item['type']})")
+            cache[item["name"]] = None
+
+    # download images in parallel for efficiency
+    if download_tasks:
+        executor = ThreadPoolExecutor(max_workers=5)
+        futures = [
+            executor.submit(_download_and_cache_image, task) for task in download_tasks
+        ]
+        remaining = max(0.0, deadline - time.monotonic()) if deadline else None
+        wait(futures, timeout=remaining)
+        # unfinished downloads complete in the background
+        executor.shutdown(wait=False)
+
+
+def _needs_download(cache, name: str, target_size: int) -> bool:
+    """
+    Check whether an entity has to be (re)downloaded to render at target_size.
+    An original smaller than target_size is still enough if it was already the
+    best variant available when fetched for a size at least that large.
+    """
+    entry = cache.get(name, _NOT_CACHED)
+    if entry is _NOT_CACHED:
+        return True
+    if entry is None:
+        return False
+    return (
+        min(entry["img"].size) < target_size
+        and entry.get("requested_size", 0) < target_size
+    )
+
+
+def _download_and_cache_image(task) -> bool:
+    """Download, decode and cache a single original image - for parallel execution"""
+    name = task["name"]
+    cache = task["cache"]
+    cancel_event = task.get("cancel_event")
+    if cancel_event is not None and cancel_event.is_set():
+        return False
+    if not cdn_breaker.allow_request():
+        return False
+
+    # transient network/CDN errors leave the entity unresolved for a later retry
+    try:
+        response = requests.get(task["image_url"], timeout=10)
+    except requests.RequestException as e:
+        cdn_breaker.record_failure()
+        print(f"Image download failed for {name}: {e}")
+        return False
+    if response.status_code >= 500 or response.status_code == 429:
+        cdn_breaker.record_failure()
+        print(f"Image download failed for {name}: HTTP {response.status_code}")
+        return False
+    cdn_breaker.record_success()
+
+    # only an image that is gone is remembered as missing; other client errors and
+    # undecodable responses may be temporary, so later renders try again
+    if response.status_code in (404, 410):
+        cache[name] = None
+        return False
+    try:
+        response.raise_for_status()
+        img = Image.open(BytesIO(response.content))
+        img.load()
+        thumbnail = img.copy()
+        thumbnail.thumbnail((COLOR_SAMPLE_SIZE, COLOR_SAMPLE_SIZE))
+        color = get_dominant_color(thumbnail, name)
+        cache[name] = {
+            "img": img,
+            "color": color,
+            "requested_size": task["target_size"],
+        }
+        return True
+    except Exception as e:
+        print(f"Image download failed for {name}: {e}")
+        return False
+
+
+def get_cached_image(
+    name: str, target_size: int, cache=image_cache, placeholder: bool = False
+) -> dict:
+    """
+    Return the cached image of an entity resized to target_size.
+
+    Resized variants are derived from the stored original on demand and kept in a
+    small LRU, so changing top_n costs at most a resize (or one download of a larger
+    variant when the stored original is too small).
 
     Args:
-        img: The image to analyze.
-        img_name: Unique identifier for caching.
+        placeholder: Return generated placeholder art for entities that are not
+            resolved yet (entities known to have no image still return None).
 
     Returns:
-        tuple: RGB color (r, g, b) between 0-255.
+        dict: {"img": resized PIL image, "color": (r, g, b)} or None if unavailable;
+            placeholder art additionally has "placeholder": True.
     """
-    if img_name in color_cache:
-        return color_cache[img_name]
+    entry = cache.get(name, _NOT_CACHED)
+    if entry is _NOT_CACHED:
+        return make_placeholder_image(name, target_size) if placeholder else None
+    if entry is None:
+        return None
+
+    key = (name, target_size)
+    variant = image_variants.get(key)
+    if variant is None or variant[0] is not entry["img"]:
+        resized = entry["img"].resize(
+            (target_size, target_size), Image.Resampling.LANCZOS
+        )
+        variant = (entry["img"], resized)
+        image_variants[key] = variant
+
+    return {"img": variant[1], "color": entry["color"]}
+
+
+@lru_cache(maxsize=256)
+def make_placeholder_image(name: str, size: int) -> dict:
+    """
+    Locally generated stand-in art: the entity's initials on a color hashed from
+    its name, used until the real image is available.
+    """
+    digest = hashlib.md5(name.encode("utf-8")).digest()
+    r, g, b = colorsys.hsv_to_rgb(digest[0] / 255, 0.55, 0.8)
+    color = (int(r * 255), int(g * 255), int(b * 255))
+
+    img = Image.new("RGB", (size, size), color)
+    initials = "".join(word[0] for word in re.findall(r"\w+", name)[:2]).upper()
+    font = ImageFont.truetype(PLACEHOLDER_FONT_PATH, max(1, int(size * 0.4)))
+    ImageDraw.Draw(img).text(
+        (size / 2, size / 2), initials or "?", font=font, fill="white", anchor="mm"
+    )
+    return {"img": img, "color": color, "placeholder": True}
 
-    with BytesIO() as byte_stream:
-        img.save(byte_stream, format="PNG")
-        byte_stream.seek(0)
-        color_thief = ColorThief(byte_stream)
-        palette = color_thief.get_palette(color_count=5, quality=5)
 
-    vibrant_colors = []
-    for rgb in palette:
-        # Convert RGB (0-255) to HSV (h: 0-1, s: 0-1, v: 0-1)
-        h, s, v = colorsys.rgb_to_hsv(rgb[0] / 255, rgb[1] / 255, rgb[2] / 255)
+def breaker_stats() -> list:
+    """State and counters of the Spotify API and image CDN circuit breakers."""
+    return [spotify_breaker.stats(), cdn_breaker.stats()]
 
-        # Filter out low-saturation (grey-like) colors
-        # s < 0.2 is very grey; v < 0.2 is too dark; v > 0.95 might be too white
-        if s > 0.3 and 0.2 < v < 0.95:
-            vibrant_colors.append(rgb)
 
-    # If no vibrant colors found, fall back to the first palette color
-    dominant_color = vibrant_colors[0] if vibrant_colors else palette[0]
+def cache_stats() -> list:
+    """Size and hit/miss/eviction counters of every shared cache."""
+    return [
+        cache.stats()
+        for cache in (image_cache, image_variants, color_cache, error_logged)
+    ]
 
-    color_cache[img_name] = dominant_color
-    return dominant_color
 
+register_cache_stats(cache_stats)
 
-def get_fonts() -> tuple:
-    """Load custom fonts for the plot.
-    Returns: tuple of FontProperties for headings and labels.
+
+def get_dominant_color(img: Image, img_name: str) -> tuple:
     """
-    font_path_heading = os.path.join(os.getcwd(), "fonts", "Montserrat-Bold.ttf")
-    font_path_labels = os.path.join(os.getcwd(), "fonts", "Montserrat-SemiBold.ttf")
-    font_prop_heading = FontProperties(
-        family="sans-serif",
-        style="normal",
-        variant="normal",
-        weight="normal",
-        stretch="normal",
-        size="medium",
-        fname=font_path_heading,
-    )
-    font_path_labels = FontProperties(
-        family="sans-serif",
-        style="normal",
-        variant="normal",
-        weight="normal",
-        stretch="normal",
-        size="medium",
-        fname=font_path_labels,
-    )
-    return font_prop_heading, font_path_labels
+    Extracts a vibrant dominant color from an image, avoiding greys.
+
+    Args:
+        img: The image to analyze.
+        img_name: Unique identifier for caching.
+
+    Returns:
+        tuple: RGB color (r, g, b) between 0-255.
+    """
+    color = color_cache.get(img_name)
+    if color is not None:
+        return color
+
+    color = dominant_color(img, color_count=5)
+
+    color_cache[img_name] = color
+    return color
 
 
 def setup_bar_plot_style(
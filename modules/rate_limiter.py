@@ -0,0 +1,72 @@
+"""
+This module provides a thread-safe rate limiter shared by every Spotify API caller,
+so foreground renders and background prefetching never exceed the request budget together.
+The schedule can be moved into shared memory with share(), so render worker processes
+draw from the same budget as the app process.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+
+class RateLimiter:
+    """Spaces calls at least 1 / calls_per_second seconds apart across all threads."""
+
+    def __init__(self, calls_per_second: float):
+        self.min_interval = 1.0 / calls_per_second
+        # time.monotonic() of the next free slot, in .value like a multiprocessing Value
+        self._next_slot = SimpleNamespace(value=0.0)
+        self._lock = threading.Lock()
+
+    def share(self, context):
+        """
+        Move the schedule into shared memory of a multiprocessing context and return
+        it; child processes pass it to attach() to use the same budget.
+        """
+        with self._lock:
+            shared = context.Value("d", self._next_slot.value)
+        self.attach(shared)
+        return shared
+
+    def attach(self, shared) -> None:
+        """Use a schedule returned by share() in another process."""
+        self._next_slot = shared
+        self._lock = shared.get_lock()
+
+    def acquire(
+        self, cancel_event: threading.Event = None, deadline: float = None
+    ) -> bool:
+        """
+        Block until the caller may make a request.
+
+        Args:
+            cancel_event: Stop waiting when this event is set.
+            deadline: time.monotonic() value; if the next free slot is later than
+                this, return immediately without reserving it.
+
+        Returns:
+            bool: False if cancelled or the deadline cannot be met, True otherwise.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.value)
+            if deadline is not None and slot > deadline:
+                return False
+            self._next_slot.value = slot + self.min_interval
+        delay = slot - now
+
+        if cancel_event is None:
+            if delay > 0:
+                time.sleep(delay)
+            return True
+        if delay > 0:
+            return not cancel_event.wait(delay)
+        return not cancel_event.is_set()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given time, e.g. after a 429 Retry-After."""
+        with self._lock:
+            self._next_slot.value = max(
+                self._next_slot.value, time.monotonic() + seconds
+            )
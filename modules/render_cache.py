@@ -0,0 +1,145 @@
+"""
+This module provides an on-disk cache of finished renders (JPEG images and MP4
+animations), keyed on a hash of the uploaded dataset and the render settings. A repeat
+request with identical settings, e.g. after a page refresh, is answered with the stored
+file instead of rendering again. The least recently used files are evicted once the
+cache exceeds its size budget.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from modules.instrumentation import register_cache_stats
+
+MB = 1024 * 1024
+
+RENDER_CACHE_DIR = os.environ.get(
+    "RENDER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "spotify_render_cache")
+)
+RENDER_CACHE_MAX_MB = int(os.environ.get("RENDER_CACHE_MAX_MB", 2048))
+# files still being written; never listed or evicted
+PARTIAL_SUFFIX = ".part"
+
+
+def dataset_hash(data: bytes) -> str:
+    """Content hash of an uploaded dataset (the raw ZIP bytes)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def render_key(kind: str, dataset: str, **params) -> str:
+    """Cache key for a render of the given kind, dataset hash and settings."""
+    payload = json.dumps(
+        {"kind": kind, "dataset": dataset, **params}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Directory of render outputs named by cache key, with LRU eviction by size.
+
+    File modification times record recency: hits touch the file, and eviction
+    removes the oldest files first. Writes go to a temporary file that is renamed
+    into place, so readers never see a partial render.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def get(self, key: str, suffix: str) -> str:
+        """Path of the cached render, or None on a miss."""
+        path = self.path_for(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def put_file(self, key: str, suffix: str, source_path: str) -> str:
+        """Move a finished render into the cache and return its cached path."""
+        temp_path = self._temp_path()
+        shutil.move(source_path, temp_path)
+        return self._commit(temp_path, key, suffix)
+
+    def put_bytes(self, key: str, suffix: str, data: bytes) -> str:
+        """Store rendered bytes in the cache and return the cached path."""
+        temp_path = self._temp_path()
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        return self._commit(temp_path, key, suffix)
+
+    def stats(self) -> dict:
+        """Size and hit/miss/eviction counters."""
+        files = self._files()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": "render_cache",
+                "entries": len(files),
+                "bytes": sum(size for _, size, _ in files),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+            }
+
+    def _temp_path(self) -> str:
+        fd, temp_path = tempfile.mkstemp(suffix=PARTIAL_SUFFIX, dir=self.directory)
+        os.close(fd)
+        return temp_path
+
+    def _commit(self, temp_path: str, key: str, suffix: str) -> str:
+        path = self.path_for(key, suffix)
+        os.replace(temp_path, path)
+        self._evict(keep=path)
+        return path
+
+    def _files(self) -> list:
+        """(path, size, mtime) of every complete cached file."""
+        files = []
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.is_file() and not entry.name.endswith(PARTIAL_SUFFIX):
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict(self, keep: str) -> None:
+        with self._lock:
+            files = sorted(self._files(), key=lambda f: f[2])
+            total = sum(size for _, size, _ in files)
+            for path, size, _ in files:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+
+render_cache = RenderCache(RENDER_CACHE_DIR, RENDER_CACHE_MAX_MB * MB)
+register_cache_stats(render_cache.stats)
@@ -0,0 +1,457 @@
+"""
+This module runs renders in a background worker pool so the Streamlit script thread
+never blocks on them. Each submitted render becomes a RenderJob whose id is kept in
+session state; the app polls the job for status, queue position, frame progress and
+ETA, and picks up the result once it is done. Jobs only start once admission control
+(modules/admission.py) grants them a render slot, and finished renders are stored in
+the render cache (modules/render_cache.py) for identical repeat requests. With
+RENDER_WORKER_PROCESSES set, the admitted render itself runs in a worker process
+(modules/render_workers.py).
+"""
+
+import io
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.animation as animation
+import matplotlib.pyplot as plt
+
+from modules.admission import MAX_QUEUED_RENDERS, RENDER_SLOTS, admission
+from modules.artifact_store import artifact_store
+from modules.create_bar_animation import (
+    create_bar_animation,
+    days,
+    dpi,
+    interp_steps,
+    period,
+)
+from modules.create_bar_plot import plot_final_frame
+from modules.data_processing import (
+    prepare_df_for_visual_anims,
+    prepare_df_for_visual_plots,
+)
+from modules.figure_templates import figure_templates
+from modules.frame_profiler import (
+    FRAME_PROFILE_DIR,
+    FRAME_PROFILE_SAMPLE_EVERY,
+    FrameProfiler,
+)
+from modules.instrumentation import request_profile, stage
+from modules.metrics import FRAMES_RENDERED, RENDER_SECONDS
+from modules.render_cache import render_cache, render_key
+from modules.render_workers import (
+    RENDER_WORKER_PROCESSES,
+    RenderPoolUnavailable,
+    get_render_pool,
+)
+from modules.retime import MASTER_FPS, retime_video
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# jobs waiting for an admission slot block a worker thread, so there is one thread
+# per possible running or queued job and admission control does the actual limiting
+RENDER_WORKERS = sum(RENDER_SLOTS.values()) + MAX_QUEUED_RENDERS
+RENDER_SUFFIXES = {"animation": ".mp4", "image": ".jpg"}
+# finished jobs are forgotten after this long if nobody collects them
+FINISHED_JOB_TTL_SECONDS = 3600
+
+
+class RenderJob:
+    """State of one background render, updated by the worker and read by the UI."""
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.stage = "Waiting for a free render slot"
+        self.queue_position = None
+        self.frames_done = 0
+        self.total_frames = 0
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.frames_started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        # RequestProfile of the render, from modules/instrumentation.py
+        self.profile = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def progress(self) -> float:
+        """Fraction of frames rendered, 0.0 to 1.0."""
+        if self.status == DONE:
+            return 1.0
+        if not self.total_frames:
+            return 0.0
+        return min(self.frames_done / self.total_frames, 1.0)
+
+    @property
+    def eta_seconds(self) -> float:
+        """Remaining render time extrapolated from the frame rate so far, or None."""
+        if self.frames_started_at is None or not self.frames_done:
+            return None
+        elapsed = time.monotonic() - self.frames_started_at
+        remaining = self.total_frames - self.frames_done
+        return elapsed / self.frames_done * remaining
+
+    def set_stage(self, stage: str) -> None:
+        self.stage = stage
+
+    def set_queue_position(self, position: int) -> None:
+        self.queue_position = position
+        self.stage = f"Waiting for a free render slot (position {position} in queue)"
+
+    def update_frames(self, frames_done: int, total_frames: int) -> None:
+        """Progress callback for FuncAnimation.save (frame index, total frames)."""
+        if self.frames_started_at is None:
+            self.frames_started_at = time.monotonic()
+            self.stage = "Rendering frames"
+        self.frames_done = frames_done + 1
+        self.total_frames = total_frames
+        FRAMES_RENDERED.inc()
+        if self.frames_done == total_frames:
+            self.stage = "Finishing video"
+
+
+class RenderJobQueue:
+    """Thread pool executing render jobs, with a registry to look them up by id."""
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="render"
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn, *args, **kwargs) -> RenderJob:
+        """
+        Queue fn(job, *args, **kwargs); its return value becomes job.result.
+        Raises AdmissionRejected if the render queue is full.
+        """
+        admission.reserve(kind)
+        job = RenderJob(kind)
+        try:
+            with self._lock:
+                self._prune()
+                self._jobs[job.id] = job
+            self._executor.submit(self._run, job, fn, args, kwargs)
+        except BaseException:
+            admission.release_reservation(kind)
+            raise
+        return job
+
+    def get(self, job_id: str) -> RenderJob:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pop(self, job_id: str) -> RenderJob:
+        """Remove a job from the registry once its result has been collected."""
+        with self._lock:
+            return self._jobs.pop(job_id, None)
+
+    def queued_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == QUEUED)
+
+    def _run(self, job: RenderJob, fn, args, kwargs) -> None:
+        try:
+            with admission.slot(
+                job.kind, on_wait=job.set_queue_position, reserved=True
+            ):
+                job.status = RUNNING
+                job.started_at = time.monotonic()
+                job.queue_position = None
+                job.stage = "Preparing data"
+                job.result = self._render(job, fn, args, kwargs)
+            job.status = DONE
+        except Exception as e:
+            print(f"Render job {job.id} ({job.kind}) failed: {e}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.monotonic()
+            if job.started_at is not None:
+                RENDER_SECONDS.labels(job.kind, job.status).observe(
+                    job.finished_at - job.started_at
+                )
+
+    def _render(self, job: RenderJob, fn, args, kwargs):
+        """Run the render in a worker process if the pool is enabled and usable."""
+        if RENDER_WORKER_PROCESSES:
+            try:
+                return get_render_pool().run(job, fn, args, kwargs)
+            except RenderPoolUnavailable:
+                pass
+        with request_profile(job.kind, job_id=job.id) as job.profile:
+            return fn(job, *args, **kwargs)
+
+    def _prune(self) -> None:
+        # callers hold the lock
+        now = time.monotonic()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at > FINISHED_JOB_TTL_SECONDS
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+render_jobs = RenderJobQueue(max_workers=RENDER_WORKERS)
+
+
+def cached_render(kind: str, dataset: str, **params) -> str:
+    """Path of a stored render with identical dataset and settings, or None."""
+    return render_cache.get(render_key(kind, dataset, **params), RENDER_SUFFIXES[kind])
+
+
+def _master_key(dataset: str, params: dict) -> str:
+    # masters are shared by every speed, so fps is not part of their key
+    return render_key(
+        "animation_master",
+        dataset,
+        **{name: value for name, value in params.items() if name != "fps"},
+    )
+
+
+def _retime_master(master_path: str, fps) -> str:
+    """Re-time a master render to fps, returning the path of a new MP4."""
+    output_path = artifact_store.new_path(".mp4")
+    try:
+        with stage("encoding"):
+            return retime_video(master_path, output_path, MASTER_FPS, fps)
+    except BaseException:
+        artifact_store.discard(output_path)
+        raise
+
+
+class StagedFFMpegWriter(animation.FFMpegWriter):
+    """
+    ffmpeg writer that records the wait for the encoder after the last frame as an
+    "encoding" stage. Frames are encoded while they are rendered, so this is the
+    part of the encode that rendering does not hide.
+    """
+
+    def finish(self) -> None:
+        with stage("encoding"):
+            super().finish()
+
+
+def cached_animation(dataset: str, **params) -> str:
+    """
+    Path of a stored animation for these settings, or None. If only the speed
+    differs from a stored render, its master is re-timed instead of re-rendered.
+    """
+    path = cached_render("animation", dataset, **params)
+    if path:
+        return path
+    master_path = render_cache.get(_master_key(dataset, params), ".mp4")
+    if master_path is None:
+        return None
+    return _animation_from_master(master_path, dataset, params)
+
+
+def _animation_from_master(master_path: str, dataset: str, params: dict) -> str:
+    """Cached animation at the requested fps, re-timed from a cached master."""
+    if params["fps"] == MASTER_FPS:
+        return master_path
+    return render_cache.put_file(
+        render_key("animation", dataset, **params),
+        ".mp4",
+        _retime_master(master_path, params["fps"]),
+    )
+
+
+def render_animation(job: RenderJob, df, dataset, **params) -> str:
+    """
+    Render the bar chart race and return the path of the MP4 at the requested fps.
+    Frames are encoded once into a master at MASTER_FPS, which is kept in the render
+    cache so that other speeds can be derived from it without re-rendering. With
+    dataset None the render bypasses the cache and the MP4 is left in the artifact
+    store.
+    """
+    with stage("aggregation"):
+        df_anim = prepare_df_for_visual_anims(
+            df,
+            selected_attribute=params["selected_attribute"],
+            analysis_metric=params["analysis_metric"],
+            start_date=params["start_date"],
+            end_date=params["end_date"],
+            top_n=params["top_n"],
+        )
+
+    # opt-in per-frame phase timings, see modules/frame_profiler.py
+    profiler = FrameProfiler(FRAME_PROFILE_SAMPLE_EVERY) if FRAME_PROFILE_DIR else None
+
+    job.set_stage("Fetching images")
+    with stage("layout"):
+        anim_bar_plot = create_bar_animation(
+            df_anim,
+            params["top_n"],
+            params["analysis_metric"],
+            params["selected_attribute"],
+            period,
+            dpi,
+            days,
+            interp_steps,
+            params["start_date"],
+            params["end_date"],
+            profiler=profiler,
+        )
+
+    job.set_stage("Rendering frames")
+    master_path = artifact_store.new_path(".mp4")
+    try:
+        writer = StagedFFMpegWriter(fps=MASTER_FPS)
+        if profiler:
+            profiler.instrument_writer(writer)
+        with stage("rendering"):
+            anim_bar_plot.save(
+                master_path,
+                writer=writer,
+                savefig_kwargs={"facecolor": "#F0F0F0"},
+                progress_callback=job.update_frames,
+            )
+    except BaseException:
+        artifact_store.discard(master_path)
+        raise
+    finally:
+        plt.close(anim_bar_plot._fig)
+
+    if profiler:
+        profiler.finish()
+        name = (
+            f"{params['selected_attribute']}_{params['analysis_metric']}"
+            f"_top{params['top_n']}_{job.id}"
+        )
+        folded_path, _ = profiler.write(FRAME_PROFILE_DIR, name)
+        print(f"Frame profile written to {folded_path}\n{profiler.format_summary()}")
+
+    if dataset is None or anim_bar_plot.uses_placeholders:
+        # placeholder renders are not cached, so the next request can pick up the
+        # real images
+        if params["fps"] == MASTER_FPS:
+            return master_path
+        output_path = _retime_master(master_path, params["fps"])
+        artifact_store.discard(master_path)
+        return output_path
+
+    master_path = render_cache.put_file(
+        _master_key(dataset, params), ".mp4", master_path
+    )
+    return _animation_from_master(master_path, dataset, params)
+
+
+def submit_animation_render(
+    df,
+    dataset,
+    selected_attribute,
+    analysis_metric,
+    start_date,
+    end_date,
+    top_n,
+    fps,
+) -> RenderJob:
+    """Queue an animation render for the given dataset hash and settings."""
+    return render_jobs.submit(
+        "animation",
+        render_animation,
+        df,
+        dataset,
+        selected_attribute=selected_attribute,
+        analysis_metric=analysis_metric,
+        start_date=start_date,
+        end_date=end_date,
+        top_n=top_n,
+        fps=fps,
+    )
+
+
+def render_image(
+    job: RenderJob,
+    df,
+    cache_key,
+    selected_attribute,
+    analysis_metric,
+    start_date,
+    end_date,
+    top_n,
+) -> bytes:
+    """
+    Render the static bar chart and return it as JPEG bytes, stored in the render
+    cache under cache_key unless that is None.
+    """
+    with stage("aggregation"):
+        df_plot = prepare_df_for_visual_plots(
+            df,
+            selected_attribute=selected_attribute,
+            analysis_metric=analysis_metric,
+            start_date=start_date,
+            end_date=end_date,
+            top_n=top_n,
+        )
+
+    job.set_stage("Drawing chart")
+    with stage("layout"):
+        fig = plot_final_frame(
+            df=df_plot,
+            top_n=top_n,
+            analysis_metric=analysis_metric,
+            selected_attribute=selected_attribute,
+            start_date=start_date,
+            end_date=end_date,
+            period=period,
+            days=days,
+        )
+    if fig is None:
+        raise ValueError("No data available for the selected date range.")
+    try:
+        buf = io.BytesIO()
+        # rasterization and JPEG encoding happen together in savefig
+        with stage("rendering"):
+            fig.savefig(
+                buf, format="jpeg", dpi=300, facecolor="#F0F0F0", edgecolor="none"
+            )
+    finally:
+        uses_placeholders = fig.uses_placeholders
+        figure_templates.release(fig)
+
+    data = buf.getvalue()
+    if cache_key is not None and not uses_placeholders:
+        render_cache.put_bytes(cache_key, ".jpg", data)
+    return data
+
+
+def submit_image_render(
+    df, dataset, selected_attribute, analysis_metric, start_date, end_date, top_n
+) -> RenderJob:
+    """Queue a static image render for the given dataset hash and settings."""
+    cache_key = render_key(
+        "image",
+        dataset,
+        selected_attribute=selected_attribute,
+        analysis_metric=analysis_metric,
+        start_date=start_date,
+        end_date=end_date,
+        top_n=top_n,
+    )
+    return render_jobs.submit(
+        "image",
+        render_image,
+        df,
+        cache_key,
+        selected_attribute,
+        analysis_metric,
+        start_date,
+        end_date,
+        top_n,
+    )
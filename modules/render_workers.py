@@ -0,0 +1,366 @@
+"""
+This module runs renders in a pool of worker processes instead of threads of the app
+process, so that renders use more than one core and the memory a render leaves
+behind is returned to the OS when its worker exits. Set RENDER_WORKER_PROCESSES to
+the number of workers to enable it; with 0 (the default) renders run in threads.
+
+Workers are forked from a forkserver that has already imported the rendering stack,
+and each worker warms up before it takes a job: it loads the fonts, the logo and the
+Spotify client and builds the figure templates of the default layout for every top
+N, so no render pays for first use. If the warm-up fails (e.g. missing credentials)
+the pool is disabled and renders run in threads again. Once the pool has run
+RENDER_WORKER_MAX_JOBS render jobs per worker it is replaced by a fresh one, to cap
+memory growth, and a health check restarts the pool if a worker died or stopped
+answering.
+
+The Spotify rate limiter and the circuit breakers live in shared memory, so workers
+and the app process keep to one request budget and one circuit state. Stage and
+frame progress is sent back over a queue to the RenderJob in the app process; the
+request profile and the worker's Spotify call and cache counters come back with the
+result and are added to the app's metrics. Workers keep their own image caches.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from modules.instrumentation import register_cache_stats, request_profile
+from modules.resources import resource
+
+RENDER_WORKER_PROCESSES = int(os.environ.get("RENDER_WORKER_PROCESSES", 0))
+RENDER_WORKER_MAX_JOBS = int(os.environ.get("RENDER_WORKER_MAX_JOBS", 20))
+HEALTH_CHECK_SECONDS = 30
+HEALTH_CHECK_TIMEOUT_SECONDS = 10
+TOP_N_LAYOUTS = range(1, 11)
+# (selected_attribute, analysis_metric) of the templates built by warm-up: the defaults
+TEMPLATE_LAYOUT = ("artist_name", "Streams")
+# imported once by the forkserver and inherited by every worker it forks
+PRELOAD_MODULES = ["matplotlib.pyplot", "pandas", "spotipy", "modules.render_jobs"]
+
+# in a worker: queue of (job id, method, args) progress events for the app process
+_events = None
+# in a worker: why the warm-up failed, if it did
+_warm_up_error = None
+# in a worker: metric totals already reported to the app process
+_reported_metrics = {}
+
+
+class WorkerWarmUpError(Exception):
+    """Raised by a job sent to a worker whose warm-up failed."""
+
+
+class RenderPoolUnavailable(Exception):
+    """Raised when the pool is disabled; the render should run in a thread instead."""
+
+
+class WorkerJob:
+    """Stand-in for the RenderJob in a worker, forwarding progress to the app."""
+
+    def __init__(self, job_id: str, kind: str):
+        self.id = job_id
+        self.kind = kind
+        self.profile = None
+
+    def set_stage(self, stage: str) -> None:
+        _events.put((self.id, "set_stage", (stage,)))
+
+    def update_frames(self, frames_done: int, total_frames: int) -> None:
+        _events.put((self.id, "update_frames", (frames_done, total_frames)))
+
+
+def prebuild_templates(dpi: int) -> None:
+    """
+    Build the figure templates of the default layout for every top N and draw each
+    once, so the fonts and glyph caches are loaded as well.
+    """
+    import io
+
+    from modules.create_bar_plot import build_figure_template
+    from modules.figure_templates import figure_templates
+
+    selected_attribute, analysis_metric = TEMPLATE_LAYOUT
+    for top_n in TOP_N_LAYOUTS:
+        fig = figure_templates.acquire(
+            (selected_attribute, analysis_metric, top_n),
+            lambda: build_figure_template(selected_attribute, analysis_metric, top_n),
+        )
+        try:
+            fig.savefig(io.BytesIO(), format="rgba", dpi=dpi)
+        finally:
+            figure_templates.release(fig)
+
+
+def share_spotify_guards(context) -> dict:
+    """Move the Spotify rate limiter and circuit breakers into shared memory."""
+    from modules import prepare_visuals
+
+    return {
+        name: getattr(prepare_visuals, name).share(context)
+        for name in ("spotify_rate_limiter", "spotify_breaker", "cdn_breaker")
+    }
+
+
+def warm_up_worker(events, spotify_guards: dict) -> None:
+    """
+    Pool initializer: attach the shared Spotify guards, then create the shared
+    resources and the figure templates. A failure is kept for ping() and run_job()
+    to report rather than raised, which would break the pool.
+    """
+    global _events, _warm_up_error
+    _events = events
+
+    import matplotlib
+
+    # workers only ever render to files
+    matplotlib.use("Agg")
+
+    from modules import prepare_visuals
+    from modules.create_bar_animation import dpi
+    from modules.resources import get_fonts, get_spotify_logo
+
+    for name, shared in spotify_guards.items():
+        getattr(prepare_visuals, name).attach(shared)
+    start = time.perf_counter()
+    try:
+        get_fonts()
+        get_spotify_logo()
+        prepare_visuals.get_spotify_client()
+        prebuild_templates(dpi)
+    except Exception as e:
+        _warm_up_error = f"{type(e).__name__}: {e}"
+        print(f"Render worker {os.getpid()} failed to warm up: {_warm_up_error}")
+        return
+    print(f"Render worker {os.getpid()} ready in {time.perf_counter() - start:.1f}s")
+
+
+def collect_metrics() -> dict:
+    """
+    Increase of the worker's Spotify call and cache counters since the last call,
+    keyed by (metric, label).
+    """
+    from modules.instrumentation import cache_counters
+    from modules.metrics import SPOTIFY_CALLS
+
+    totals = {}
+    for sample in SPOTIFY_CALLS.collect()[0].samples:
+        if sample.name.endswith("_total"):
+            totals[("spotify_calls", sample.labels["outcome"])] = sample.value
+    for name, (hits, misses) in cache_counters().items():
+        totals[("cache_hits", name)] = hits
+        totals[("cache_misses", name)] = misses
+    increase = {
+        key: value - _reported_metrics.get(key, 0)
+        for key, value in totals.items()
+        if value != _reported_metrics.get(key, 0)
+    }
+    _reported_metrics.update(totals)
+    return increase
+
+
+def run_job(job_id: str, kind: str, fn, args, kwargs) -> tuple:
+    """
+    Run fn(job, *args, **kwargs) in a worker. Returns (result, profile, error,
+    metrics); the profile and metrics are returned even when the render fails.
+    """
+    if _warm_up_error is not None:
+        raise WorkerWarmUpError(_warm_up_error)
+    job = WorkerJob(job_id, kind)
+    try:
+        with request_profile(kind, job_id=job_id) as job.profile:
+            result = fn(job, *args, **kwargs)
+        return result, job.profile, None, collect_metrics()
+    except Exception as e:
+        return None, job.profile, str(e), collect_metrics()
+
+
+def ping() -> str:
+    """The warm-up error of the worker, None if it is ready."""
+    return _warm_up_error
+
+
+class RenderWorkerPool:
+    """
+    Process pool for render jobs, with progress relay, metrics and health checks.
+
+    Args:
+        processes: Number of worker processes.
+        max_jobs: Render jobs per worker before the pool is replaced.
+    """
+
+    def __init__(self, processes: int, max_jobs: int):
+        self.processes = processes
+        self.max_jobs = max_jobs
+        self.restarts = 0
+        self.recycles = 0
+        self.disabled = None  # reason the pool was disabled
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload(PRELOAD_MODULES)
+        self._events = self._context.Queue()
+        self._spotify_guards = share_spotify_guards(self._context)
+        self._jobs = {}  # job id -> RenderJob being run by a worker
+        self._pool_jobs = 0  # render jobs sent to the current executor
+        self._worker_caches = {}  # (cache_hits|cache_misses, cache name) -> count
+        self._lock = threading.Lock()
+        self._executor = None
+        self._start()
+        register_cache_stats(self.cache_stats)
+        threading.Thread(
+            target=self._relay_events, name="render-events", daemon=True
+        ).start()
+        threading.Thread(
+            target=self._check_health, name="render-health", daemon=True
+        ).start()
+
+    def run(self, job, fn, args, kwargs):
+        """
+        Run fn(job, *args, **kwargs) in a worker and return its result, while the
+        worker's progress updates job. Sets job.profile; raises if the render failed,
+        or RenderPoolUnavailable if the pool is disabled.
+        """
+        retired = None
+        with self._lock:
+            if self.disabled:
+                raise RenderPoolUnavailable(self.disabled)
+            if self._pool_jobs >= self.processes * self.max_jobs:
+                retired = self._executor
+                self._start()
+                self.recycles += 1
+            self._pool_jobs += 1
+            self._jobs[job.id] = job
+            executor = self._executor
+        if retired is not None:
+            # jobs still running in the retired workers finish first
+            retired.shutdown(wait=False)
+        try:
+            future = executor.submit(run_job, job.id, job.kind, fn, args, kwargs)
+            result, job.profile, error, metrics = future.result()
+        except WorkerWarmUpError as e:
+            self._disable(str(e))
+            raise RenderPoolUnavailable(str(e))
+        except BrokenProcessPool:
+            self.restart(executor)
+            raise RuntimeError("The render worker stopped unexpectedly")
+        finally:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+        self._add_metrics(metrics)
+        if error is not None:
+            raise RuntimeError(error)
+        return result
+
+    def restart(self, executor=None) -> None:
+        """Replace the pool (only if it is still the given executor, when given)."""
+        with self._lock:
+            if executor is not None and executor is not self._executor:
+                return
+            old_executor = self._executor
+            self._start()
+            self.restarts += 1
+        old_executor.shutdown(wait=False, cancel_futures=True)
+        print(f"Render worker pool restarted ({self.restarts} restarts)")
+
+    def health(self) -> dict:
+        """
+        Whether an idle pool answers a ping; busy pools are assumed healthy. Pings
+        do not count towards the jobs after which the pool is replaced.
+        """
+        with self._lock:
+            executor, busy = self._executor, bool(self._jobs)
+        stats = {"restarts": self.restarts, "recycles": self.recycles}
+        if self.disabled:
+            return {"healthy": False, "busy": False, "disabled": self.disabled, **stats}
+        if busy:
+            return {"healthy": True, "busy": True, **stats}
+        try:
+            future = executor.submit(ping)
+            healthy = future.result(timeout=HEALTH_CHECK_TIMEOUT_SECONDS) is None
+        except Exception:
+            healthy = False
+        return {"healthy": healthy, "busy": False, **stats}
+
+    def cache_stats(self) -> list:
+        """Cache hits and misses in the workers, as reported with their results."""
+        with self._lock:
+            names = sorted({name for _, name in self._worker_caches})
+            return [
+                {
+                    "name": name,
+                    "hits": self._worker_caches.get(("cache_hits", name), 0),
+                    "misses": self._worker_caches.get(("cache_misses", name), 0),
+                }
+                for name in names
+            ]
+
+    def _start(self) -> None:
+        # callers hold the lock, apart from __init__
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=self._context,
+            initializer=warm_up_worker,
+            initargs=(self._events, self._spotify_guards),
+        )
+        self._pool_jobs = 0
+        # workers are only started for submitted work, so start them all now
+        for _ in range(self.processes):
+            self._executor.submit(ping).add_done_callback(self._check_warm_up)
+
+    def _check_warm_up(self, future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        if future.result() is not None:
+            self._disable(future.result())
+
+    def _disable(self, reason: str) -> None:
+        # no lock: may run in a callback of a future submitted under it
+        if self.disabled:
+            return
+        self.disabled = reason
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        print(f"Render worker pool disabled, rendering in threads instead: {reason}")
+
+    def _add_metrics(self, metrics: dict) -> None:
+        from modules.metrics import SPOTIFY_CALLS
+
+        with self._lock:
+            for (metric, label), value in metrics.items():
+                if metric == "spotify_calls":
+                    SPOTIFY_CALLS.labels(label).inc(value)
+                else:
+                    key = (metric, label)
+                    self._worker_caches[key] = self._worker_caches.get(key, 0) + value
+
+    def _relay_events(self) -> None:
+        while True:
+            job_id, method, args = self._events.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is not None:
+                getattr(job, method)(*args)
+
+    def _check_health(self) -> None:
+        while not self.disabled:
+            time.sleep(HEALTH_CHECK_SECONDS)
+            with self._lock:
+                executor = self._executor
+            try:
+                if not self.health()["healthy"] and not self.disabled:
+                    self.restart(executor)
+            except RuntimeError as e:
+                # e.g. the interpreter is shutting down
+                print(f"Render worker health check failed: {e}")
+                return
+
+
+@resource
+def get_render_pool() -> RenderWorkerPool:
+    """The render worker pool of this process, started on first use."""
+    return RenderWorkerPool(RENDER_WORKER_PROCESSES, RENDER_WORKER_MAX_JOBS)
+
+
+def start_render_workers() -> None:
+    """Start the worker pool if it is enabled, so it is warm by the first render."""
+    if RENDER_WORKER_PROCESSES:
+        get_render_pool()
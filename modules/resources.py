@@ -0,0 +1,109 @@
+"""
+This module provides a process-wide registry of expensive shared resources: the plot
+fonts, the decoded Spotify logo and the API clients. Each resource is created once per
+process on first use and then shared by every session, render and thread, like
+Streamlit's st.cache_resource but usable without the Streamlit runtime (e.g. from
+background render threads or the command line).
+"""
+
+import os
+import threading
+from functools import wraps
+
+from modules.paths import ROOT_DIR
+
+FONT_DIR = os.path.join(ROOT_DIR, "fonts")
+LOGO_PATH = os.path.join(
+    ROOT_DIR, "2024 Spotify Brand Assets", "Spotify_Full_Logo_RGB_Green.png"
+)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def resource(fn):
+    """
+    Decorator turning a zero-argument factory into a lazily created, process-wide
+    shared resource. The wrapper gains set(value) to replace the resource (e.g. with
+    a stand-in client) and clear() to drop it so the next call recreates it.
+    """
+    lock = threading.Lock()
+    state = {}
+
+    @wraps(fn)
+    def get():
+        if "value" not in state:
+            with lock:
+                if "value" not in state:
+                    state["value"] = fn()
+        return state["value"]
+
+    def set_value(value) -> None:
+        with lock:
+            state["value"] = value
+
+    def clear() -> None:
+        with lock:
+            state.pop("value", None)
+
+    get.set = set_value
+    get.clear = clear
+    get.loaded = lambda: "value" in state
+    with _registry_lock:
+        _registry[f"{fn.__module__}.{fn.__name__}"] = get
+    return get
+
+
+def loaded_resources() -> list:
+    """Names of registered resources that have been created in this process."""
+    with _registry_lock:
+        return sorted(name for name, get in _registry.items() if get.loaded())
+
+
+def clear_resources() -> None:
+    """Drop every resource, e.g. after changing credentials."""
+    with _registry_lock:
+        getters = list(_registry.values())
+    for get in getters:
+        get.clear()
+
+
+@resource
+def get_fonts() -> tuple:
+    """Load custom fonts for the plot.
+    Returns: tuple of FontProperties for headings and labels.
+    """
+    from matplotlib.font_manager import FontProperties
+
+    font_path_heading = os.path.join(FONT_DIR, "Montserrat-Bold.ttf")
+    font_path_labels = os.path.join(FONT_DIR, "Montserrat-SemiBold.ttf")
+    font_prop_heading = FontProperties(
+        family="sans-serif",
+        style="normal",
+        variant="normal",
+        weight="normal",
+        stretch="normal",
+        size="medium",
+        fname=font_path_heading,
+    )
+    font_path_labels = FontProperties(
+        family="sans-serif",
+        style="normal",
+        variant="normal",
+        weight="normal",
+        stretch="normal",
+        size="medium",
+        fname=font_path_labels,
+    )
+    return font_prop_heading, font_path_labels
+
+
+@resource
+def get_spotify_logo():
+    """Decoded Spotify logo as a read-only RGBA array for imshow."""
+    import matplotlib.image as mpimg
+
+    logo = mpimg.imread(LOGO_PATH)
+    # shared between concurrent renders, so guard against in-place edits
+    logo.setflags(write=False)
+    return logo
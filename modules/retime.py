@@ -0,0 +1,45 @@
+"""
+This module changes the playback speed of a rendered MP4 without re-rendering it.
+The animation speed options only change the frame rate, so a new speed is produced by
+rescaling the stream's timestamps and re-muxing the existing encoded frames
+(ffmpeg -itsscale with stream copy), which takes well under a second.
+"""
+
+import subprocess
+
+import matplotlib as mpl
+
+# frame rate every master render is encoded at; other speeds are re-timed from it
+MASTER_FPS = 28
+
+
+def retime_video(source_path: str, output_path: str, source_fps, target_fps) -> str:
+    """
+    Write a copy of source_path playing at target_fps instead of source_fps.
+
+    Args:
+        source_path: MP4 encoded at source_fps.
+        output_path: Where to write the re-timed MP4.
+
+    Returns:
+        str: output_path.
+    """
+    command = [
+        mpl.rcParams["animation.ffmpeg_path"],
+        "-v",
+        "error",
+        "-y",
+        "-itsscale",
+        f"{source_fps / target_fps:.6f}",
+        "-i",
+        source_path,
+        "-c",
+        "copy",
+        "-movflags",
+        "+faststart",
+        output_path,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to re-time video: {result.stderr.strip()}")
+    return output_path
@@ -0,0 +1,163 @@
+"""
+This module keeps the processed streaming history of each session on disk instead of
+in session state. A dataset is written once as an uncompressed Arrow IPC file in a
+temp directory and read back through a memory map when a rerun needs it, so between
+reruns a session only holds a small DatasetHandle, and the pages of the file are
+shared with the OS page cache rather than held by every session.
+
+A file is removed when its handle is garbage collected (the session ended, or a new
+upload replaced the dataset) or once it has not been read for SESSION_DATA_TTL_SECONDS.
+A session whose file expired gets None back and processes its upload again.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+import pandas as pd
+import pyarrow as pa
+
+from modules.instrumentation import register_cache_stats
+
+SESSION_DATA_DIR = os.environ.get(
+    "SESSION_DATA_DIR", os.path.join(tempfile.gettempdir(), "spotify_session_data")
+)
+SESSION_DATA_TTL_SECONDS = int(os.environ.get("SESSION_DATA_TTL_SECONDS", 3600))
+SWEEP_INTERVAL_SECONDS = 60
+SUFFIX = ".arrow"
+# files still being written; never read or swept
+PARTIAL_SUFFIX = ".part"
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class DatasetHandle:
+    """
+    Session state reference to a stored dataset. The file is deleted by delete() or
+    when the last reference to the handle goes away.
+    """
+
+    def __init__(self, path: str, source_id: str, rows: int):
+        self.path = path
+        self.source_id = source_id  # e.g. the file_id of the upload it came from
+        self.rows = rows
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    def delete(self) -> None:
+        self._finalizer()
+
+
+class SessionDataStore:
+    """Directory of per-session Arrow IPC files with idle expiry by modification time."""
+
+    def __init__(self, directory: str, ttl_seconds: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._next_sweep = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, df: pd.DataFrame, source_id: str = None) -> DatasetHandle:
+        """Write df to a new file and return the handle to keep in session state."""
+        self.sweep()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        fd, temp_path = tempfile.mkstemp(suffix=PARTIAL_SUFFIX, dir=self.directory)
+        os.close(fd)
+        try:
+            with pa.OSFile(temp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            path = temp_path[: -len(PARTIAL_SUFFIX)] + SUFFIX
+            os.replace(temp_path, path)
+        except BaseException:
+            _remove(temp_path)
+            raise
+        return DatasetHandle(path, source_id, len(df))
+
+    def exists(self, handle: DatasetHandle, source_id: str = None) -> bool:
+        """
+        Whether the dataset of the handle (from source_id, if given) is still stored,
+        without reading it. Like get(), this refreshes the expiry time.
+        """
+        if handle is None or (source_id is not None and handle.source_id != source_id):
+            return False
+        try:
+            os.utime(handle.path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def get(self, handle: DatasetHandle, source_id: str = None) -> pd.DataFrame:
+        """
+        DataFrame of the stored dataset, or None if there is no handle, the handle
+        belongs to another source or the file has expired.
+        """
+        self.sweep()
+        if handle is None or (source_id is not None and handle.source_id != source_id):
+            return None
+        try:
+            # reads refresh the expiry time
+            os.utime(handle.path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with pa.memory_map(handle.path) as source:
+            df = pa.ipc.open_file(source).read_all().to_pandas()
+        with self._lock:
+            self.hits += 1
+        return df
+
+    def sweep(self) -> None:
+        """Remove files that have not been read within the TTL (at most once a minute)."""
+        now = time.time()
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+        for path, _, mtime in self._files():
+            if now - mtime > self.ttl_seconds:
+                _remove(path)
+                with self._lock:
+                    self.expired += 1
+
+    def stats(self) -> dict:
+        """Stored files and bytes, and read hits/misses."""
+        files = self._files()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": "session_data",
+                "entries": len(files),
+                "bytes": sum(size for _, size, _ in files),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "expired": self.expired,
+            }
+
+    def _files(self) -> list:
+        """(path, size, mtime) of every complete stored file."""
+        files = []
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.is_file() and entry.name.endswith(SUFFIX):
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+
+session_store = SessionDataStore(SESSION_DATA_DIR, SESSION_DATA_TTL_SECONDS)
+register_cache_stats(session_store.stats)
@@ -5,10 +5,13 @@ It uses the Supabase Python client to connect to the database.
 Supabase is used as a backend for monitoring the web app user activity.
 """
 
-import streamlit as st
-from supabase import create_client
+from modules.config import get_secret
+from modules.resources import resource
 
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+@resource
+def get_supabase_client():
+    """Shared Supabase client, created on first use rather than at import."""
+    from supabase import create_client
+
+    return create_client(get_secret("SUPABASE_URL"), get_secret("SUPABASE_KEY"))
@@ -0,0 +1,230 @@
+"""
+This module sends user events to the analytics backend in the background. Events are
+queued without blocking the page, then written in bulk by a worker thread whenever
+a batch fills up or the flush interval passes. If the backend is unavailable, batches
+are spooled to a local SQLite file and re-sent once it recovers, so events survive
+outages and restarts.
+
+The sink is any callable taking a list of event dicts, e.g. a list's extend method
+as a local stand-in for Supabase in tests.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from modules.supabase_client import get_supabase_client
+
+TELEMETRY_BATCH_SIZE = 50
+TELEMETRY_FLUSH_SECONDS = 5.0
+TELEMETRY_RETRY_SECONDS = 30.0
+TELEMETRY_MAX_QUEUED = 10000
+TELEMETRY_SPOOL_PATH = os.environ.get(
+    "TELEMETRY_SPOOL_PATH",
+    os.path.join(tempfile.gettempdir(), "spotify_telemetry_spool.sqlite3"),
+)
+
+
+def supabase_sink(events: list) -> None:
+    """Insert a batch of events into the Supabase user_events table."""
+    get_supabase_client().table("user_events").insert(events).execute()
+
+
+class TelemetryQueue:
+    """
+    Write-behind event queue with batching and a SQLite spool.
+
+    Args:
+        sink: Callable writing a list of events; exceptions mean "backend down".
+        spool_path: SQLite file holding events that could not be sent.
+        batch_size: Events per bulk write; a full batch is flushed immediately.
+        flush_interval: Maximum seconds an event waits before being flushed.
+        retry_interval: Seconds between attempts to re-send spooled events.
+    """
+
+    def __init__(
+        self,
+        sink,
+        spool_path: str = TELEMETRY_SPOOL_PATH,
+        batch_size: int = TELEMETRY_BATCH_SIZE,
+        flush_interval: float = TELEMETRY_FLUSH_SECONDS,
+        retry_interval: float = TELEMETRY_RETRY_SECONDS,
+        max_queued: int = TELEMETRY_MAX_QUEUED,
+    ):
+        self.sink = sink
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._next_retry = 0.0
+        self.enqueued = 0
+        self.sent = 0
+        self.spooled = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def track(self, event: dict) -> None:
+        """Queue an event without blocking; drops it if the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = None) -> bool:
+        """Send everything queued so far; returns False if it timed out."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def spooled_count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "spooled": self.spooled,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+            "queued": self._queue.qsize(),
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="telemetry", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        # events spooled by an earlier process go out first
+        try:
+            self._drain_spool()
+        except Exception as e:
+            print(f"Telemetry spool error: {e}")
+        while True:
+            flush_done = None
+            # an error (e.g. a full disk or locked spool) must not end the thread
+            try:
+                batch, flush_done = self._collect_batch()
+                if batch:
+                    self._send(batch)
+                if time.monotonic() >= self._next_retry:
+                    self._drain_spool()
+            except Exception as e:
+                print(f"Telemetry spool error: {e}")
+            finally:
+                if flush_done is not None:
+                    flush_done.set()
+
+    def _collect_batch(self) -> tuple:
+        """Wait for a full batch, the flush interval or a flush request."""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is None and time.monotonic() < self._next_retry:
+                # wake up to retry the spool even when no new events arrive
+                timeout = self._next_retry - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if isinstance(item, threading.Event):
+                return batch, item
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch, None
+
+    def _send(self, batch: list) -> None:
+        if time.monotonic() < self._next_retry:
+            # backend known to be down, don't wait on it for every batch
+            self._spool(batch)
+            return
+        try:
+            self.sink(batch)
+            self.sent += len(batch)
+        except Exception as e:
+            self._log_failure(e)
+            self._spool(batch)
+
+    def _drain_spool(self) -> None:
+        """Re-send spooled events oldest first, until empty or a send fails."""
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT id, payload FROM spool ORDER BY id LIMIT ?",
+                    (self.batch_size,),
+                ).fetchall()
+            if not rows:
+                return
+            try:
+                self.sink([json.loads(payload) for _, payload in rows])
+            except Exception as e:
+                self._log_failure(e)
+                return
+            self.sent += len(rows)
+            with self._connect() as conn:
+                conn.executemany(
+                    "DELETE FROM spool WHERE id = ?", [(row_id,) for row_id, _ in rows]
+                )
+
+    def _spool(self, batch: list) -> None:
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO spool (payload) VALUES (?)",
+                    [(json.dumps(event, default=str),) for event in batch],
+                )
+        except sqlite3.Error:
+            self.dropped += len(batch)
+            raise
+        self.spooled += len(batch)
+
+    def _log_failure(self, e: Exception) -> None:
+        self.failed_flushes += 1
+        self._next_retry = time.monotonic() + self.retry_interval
+        error_message = str(e).lower()
+        if "rate" in error_message or "limit" in error_message:
+            print(f"SUPABASE RATE LIMIT: {e}")
+        else:
+            print(f"SUPABASE ERROR: {e}")
+
+    @contextmanager
+    def _connect(self):
+        """SQLite connection to the spool, committed and closed on exit."""
+        conn = sqlite3.connect(self.spool_path, timeout=10)
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS spool "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)"
+            )
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+
+telemetry = TelemetryQueue(supabase_sink)
+# send whatever is still queued when the server shuts down
+atexit.register(telemetry.flush, timeout=5)
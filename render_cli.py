@@ -0,0 +1,222 @@
+"""
+Render images and animations from a Spotify streaming history ZIP without Streamlit.
+
+Every combination of the given attributes, metrics, top N values and (for animations)
+speeds is rendered with the same code the web app uses, and written to the output
+directory together with a manifest.json of timings. Renders go through the shared
+render cache unless --no-cache is given, so repeat runs only render what changed.
+
+Credentials are read from the environment or the config file (see modules/config.py):
+SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET.
+
+Usage:
+    python render_cli.py history.zip --attributes Artist,Song --top-n 5,10
+        [--metrics "Number of Streams"] [--kinds image,animation] [--speeds Medium]
+        [--start 2020-01-01] [--end 2024-12-31] [--output-dir renders] [--no-cache]
+        [--metrics-file metrics.prom]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import time
+
+import pandas as pd
+
+from modules.data_processing import extract_json_from_zip, fetch_and_process_files
+from modules.metrics import RENDER_SECONDS, metrics_text, record_ingest
+from modules.normalize_inputs import ATTRIBUTE_MAP, METRIC_MAP, normalize_inputs
+from modules.render_cache import dataset_hash, render_cache, render_key
+from modules.render_jobs import (
+    RENDER_SUFFIXES,
+    RenderJob,
+    cached_animation,
+    cached_render,
+    render_animation,
+    render_image,
+)
+
+# the speed options of the app and the frame rate each one encodes at
+SPEED_FPS = {"Slow": 20, "Medium": 28, "Fast": 36}
+
+
+def split_list(value: str) -> list:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def load_history(zip_path: str) -> tuple:
+    """DataFrame of the streaming history in the ZIP and the dataset hash."""
+    with open(zip_path, "rb") as f:
+        data = f.read()
+    json_contents = extract_json_from_zip(zip_path)
+    if not json_contents:
+        raise FileNotFoundError(f"No Streaming History JSON files found in {zip_path}")
+    df = fetch_and_process_files(json_contents)
+    record_ingest(len(data), len(df))
+    return df, dataset_hash(data)
+
+
+def render_matrix(args) -> list:
+    """All (kind, params, speed) combinations requested on the command line."""
+    combinations = []
+    for kind, attribute, metric, top_n in itertools.product(
+        args.kinds, args.attributes, args.metrics, args.top_n
+    ):
+        selected_attribute, analysis_metric = normalize_inputs(attribute, metric)
+        params = {
+            "selected_attribute": selected_attribute,
+            "analysis_metric": analysis_metric,
+            "top_n": top_n,
+        }
+        if kind == "animation":
+            for speed in args.speeds:
+                combinations.append((kind, {**params, "fps": SPEED_FPS[speed]}, speed))
+        else:
+            combinations.append((kind, params, None))
+    return combinations
+
+
+def output_name(kind: str, params: dict, speed: str) -> str:
+    name = (
+        f"{params['selected_attribute']}_{params['analysis_metric']}"
+        f"_top{params['top_n']}"
+        f"_{params['start_date']:%Y%m%d}-{params['end_date']:%Y%m%d}"
+    )
+    if speed:
+        name += f"_{speed.lower()}"
+    return name + RENDER_SUFFIXES[kind]
+
+
+def render_one(df, dataset, kind: str, params: dict, output_path: str, use_cache):
+    """Render one combination to output_path; returns whether the cache served it."""
+    if use_cache:
+        if kind == "animation":
+            cached_path = cached_animation(dataset, **params)
+        else:
+            cached_path = cached_render(kind, dataset, **params)
+        if cached_path:
+            shutil.copyfile(cached_path, output_path)
+            return True
+
+    job = RenderJob(kind)
+    if kind == "animation":
+        path = render_animation(job, df, dataset if use_cache else None, **params)
+        # cache entries stay where they are; anything else (an uncached render, or
+        # placeholder art the cache refused) is a scratch file in the artifact store
+        in_cache = os.path.dirname(os.path.abspath(path)) == os.path.abspath(
+            render_cache.directory
+        )
+        if in_cache:
+            shutil.copyfile(path, output_path)
+        else:
+            shutil.move(path, output_path)
+    else:
+        cache_key = render_key(kind, dataset, **params) if use_cache else None
+        with open(output_path, "wb") as f:
+            f.write(render_image(job, df, cache_key, **params))
+    return False
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Batch render Spotify bar charts and animations."
+    )
+    parser.add_argument("zip", help="Spotify extended streaming history ZIP")
+    parser.add_argument(
+        "--attributes",
+        type=split_list,
+        default=list(ATTRIBUTE_MAP),
+        help=f"comma separated, from {', '.join(ATTRIBUTE_MAP)}",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=split_list,
+        default=["Number of Streams"],
+        help=f"comma separated, from {', '.join(METRIC_MAP)}",
+    )
+    parser.add_argument(
+        "--top-n",
+        type=lambda value: [int(n) for n in split_list(value)],
+        default=[10],
+        help="comma separated numbers of items to show",
+    )
+    parser.add_argument(
+        "--kinds",
+        type=split_list,
+        default=["image", "animation"],
+        help="comma separated, from image, animation",
+    )
+    parser.add_argument(
+        "--speeds",
+        type=split_list,
+        default=["Medium"],
+        help=f"animation speeds, from {', '.join(SPEED_FPS)}",
+    )
+    parser.add_argument("--start", help="first date (default: start of the data)")
+    parser.add_argument("--end", help="last date (default: end of the data)")
+    parser.add_argument("--output-dir", default="renders")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always render, without reading or writing the render cache",
+    )
+    parser.add_argument(
+        "--metrics-file", help="write Prometheus metrics in text format to this path"
+    )
+    args = parser.parse_args()
+
+    for option, values, choices in (
+        ("--attributes", args.attributes, ATTRIBUTE_MAP),
+        ("--metrics", args.metrics, METRIC_MAP),
+        ("--kinds", args.kinds, RENDER_SUFFIXES),
+        ("--speeds", args.speeds, SPEED_FPS),
+    ):
+        unknown = [value for value in values if value not in choices]
+        if unknown:
+            parser.error(f"{option}: unknown value(s) {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    df, dataset = load_history(args.zip)
+    print(f"Loaded {len(df)} plays in {time.perf_counter() - start:.1f} s")
+    start_date = pd.to_datetime(args.start) if args.start else df["Date"].min()
+    end_date = pd.to_datetime(args.end) if args.end else df["Date"].max()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    combinations = render_matrix(args)
+    results = []
+    for i, (kind, params, speed) in enumerate(combinations, start=1):
+        params = {**params, "start_date": start_date, "end_date": end_date}
+        output_path = os.path.join(args.output_dir, output_name(kind, params, speed))
+        start = time.perf_counter()
+        result = {"kind": kind, "speed": speed, "output": output_path, **params}
+        try:
+            result["cached"] = render_one(
+                df, dataset, kind, params, output_path, not args.no_cache
+            )
+            result["status"] = "done"
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        if not result.get("cached"):
+            RENDER_SECONDS.labels(kind, result["status"]).observe(result["seconds"])
+        results.append(result)
+        detail = "cached" if result.get("cached") else result.get("error", "rendered")
+        print(
+            f"[{i}/{len(combinations)}] {result['status']}: {output_path} "
+            f"({detail}, {result['seconds']:.1f} s)"
+        )
+
+    with open(os.path.join(args.output_dir, "manifest.json"), "w") as f:
+        json.dump({"zip": args.zip, "renders": results}, f, indent=2, default=str)
+    if args.metrics_file:
+        with open(args.metrics_file, "w") as f:
+            f.write(metrics_text())
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
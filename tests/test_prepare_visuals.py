@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+import requests
+
+from modules import create_bar_plot, prepare_visuals
+from modules.figure_templates import figure_templates
+
+
+class UnreachableSpotify:
+    """Spotify client whose every call fails as if the API host were down."""
+
+    def _fail(self, *args, **kwargs):
+        raise requests.ConnectionError("Spotify API unreachable")
+
+    tracks = artists = albums = search = _fail
+
+
+@pytest.fixture
+def offline_spotify():
+    prepare_visuals.set_spotify_client(UnreachableSpotify())
+    prepare_visuals.image_cache.clear()
+    prepare_visuals.image_variants.clear()
+    yield
+    prepare_visuals.get_spotify_client.clear()
+
+
+def plays():
+    dates = pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"])
+    return pd.DataFrame(
+        {
+            "Date": dates.repeat(2),
+            "track_name": ["Song A", "Song B"] * 3,
+            "artist_name": ["Artist A", "Artist B"] * 3,
+            "track_uri": ["spotify:track:a", "spotify:track:b"] * 3,
+        }
+    )
+
+
+def render_final_frame():
+    df = plays()
+    return create_bar_plot.plot_final_frame(
+        df=df,
+        top_n=2,
+        analysis_metric="Streams",
+        selected_attribute="track_name",
+        start_date=df["Date"].min(),
+        end_date=df["Date"].max(),
+        period="D",
+        days=1,
+    )
+
+
+def test_connection_error_renders_placeholders(offline_spotify):
+    fig = render_final_frame()
+    try:
+        assert fig.uses_placeholders
+        assert "Song A" not in prepare_visuals.image_cache
+    finally:
+        figure_templates.release(fig)
+
+
+def test_failed_batch_lookup_renders_placeholders(offline_spotify, monkeypatch):
+    def fail(*args, **kwargs):
+        raise requests.ConnectionError("Spotify API unreachable")
+
+    monkeypatch.setattr(prepare_visuals, "fetch_images_batch", fail)
+    fig = render_final_frame()
+    try:
+        assert fig.uses_placeholders
+        assert "Song A" not in prepare_visuals.image_cache
+    finally:
+        figure_templates.release(fig)